@@ -11,6 +11,7 @@ from enum import Enum
 class DocumentStatus(str, Enum):
     """Document processing status"""
 
+    PENDING_UPLOAD = "pending_upload"
     UPLOADED = "uploaded"
     PROCESSING = "processing"
     COMPLETED = "completed"
@@ -39,6 +39,7 @@ class CloudWatchService:
 
         self.cloudwatch = boto3.client("cloudwatch", region_name=settings.AWS_REGION)
         self.logs = boto3.client("logs", region_name=settings.AWS_REGION)
+        self.lambda_client = boto3.client("lambda", region_name=settings.AWS_REGION)
 
     def get_lambda_metrics(
         self, function_names: Optional[List[str]] = None, hours: int = 24
@@ -200,8 +201,7 @@ class CloudWatchService:
     def _get_memory_allocation(self, function_name: str) -> int:
         """Get allocated memory for a Lambda function"""
         try:
-            lambda_client = boto3.client("lambda", region_name="us-east-1")
-            response = lambda_client.get_function_configuration(FunctionName=function_name)
+            response = self.lambda_client.get_function_configuration(FunctionName=function_name)
             return response.get("MemorySize", 128)
         except Exception as e:
             logger.error(f"Failed to get memory for {function_name}: {e}")
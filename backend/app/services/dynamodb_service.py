@@ -6,6 +6,7 @@ import boto3
 from botocore.exceptions import ClientError
 from app.config import settings
 from app.models.schemas import ExtractionResult, DocumentStatus
+from app.services.metrics_service import prompt_version_shard
 import logging
 from typing import Optional, List
 from datetime import datetime
@@ -47,17 +48,39 @@ class DynamoDBService:
                 AttributeDefinitions=[
                     {"AttributeName": "document_id", "AttributeType": "S"},
                     {"AttributeName": "uploaded_at", "AttributeType": "S"},
+                    {"AttributeName": "prompt_version_shard", "AttributeType": "S"},
+                    {"AttributeName": "extracted_at", "AttributeType": "S"},
                 ],
                 GlobalSecondaryIndexes=[
                     {
-                        "IndexName": "UploadedAtIndex",
+                        "IndexName": "UploadedAtKeysIndex",
                         "KeySchema": [{"AttributeName": "uploaded_at", "KeyType": "HASH"}],
-                        "Projection": {"ProjectionType": "ALL"},
+                        "Projection": {"ProjectionType": "KEYS_ONLY"},
                         "ProvisionedThroughput": {
                             "ReadCapacityUnits": 5,
                             "WriteCapacityUnits": 5,
                         },
-                    }
+                    },
+                    {
+                        "IndexName": "PromptVersionShardIndex",
+                        "KeySchema": [
+                            {"AttributeName": "prompt_version_shard", "KeyType": "HASH"},
+                            {"AttributeName": "extracted_at", "KeyType": "RANGE"},
+                        ],
+                        "Projection": {
+                            "ProjectionType": "INCLUDE",
+                            "NonKeyAttributes": [
+                                "status",
+                                "processing_time_ms",
+                                "token_usage",
+                                "model_id",
+                            ],
+                        },
+                        "ProvisionedThroughput": {
+                            "ReadCapacityUnits": 5,
+                            "WriteCapacityUnits": 5,
+                        },
+                    },
                 ],
                 ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
             )
@@ -142,6 +165,9 @@ class DynamoDBService:
 
             if result.prompt_version:
                 item["prompt_version"] = result.prompt_version
+                item["prompt_version_shard"] = prompt_version_shard(
+                    result.prompt_version, result.document_id
+                )
 
             if result.token_usage:
                 item["token_usage"] = result.token_usage
@@ -6,16 +6,42 @@ Implements proper statistical testing for A/B experiments.
 """
 
 import boto3
-from typing import Dict, Optional, Any
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import logging
 from dataclasses import dataclass
 from enum import Enum
 import statistics
 import os
+import time
+import zlib
+
+from app.services.prompt_manager import PromptManager
 
 logger = logging.getLogger(__name__)
 
+# Write shards per prompt version in PromptVersionShardIndex. A few prompt versions take
+# all the traffic, so the index key spreads each one over this many partitions.
+PROMPT_VERSION_SHARDS = 16
+
+
+def prompt_version_shard(prompt_version: str, document_id: str) -> str:
+    """
+    Build the PromptVersionShardIndex partition key for a result
+
+    Args:
+        prompt_version: Prompt version the document was extracted with
+        document_id: Document identifier (picks the shard)
+
+    Returns:
+        Key of the form "{prompt_version}#{shard:x}"
+    """
+    shard = zlib.crc32(document_id.encode("utf-8")) % PROMPT_VERSION_SHARDS
+    return f"{prompt_version}#{shard:x}"
+
 
 class MetricType(str, Enum):
     """Types of metrics tracked"""
@@ -106,30 +132,56 @@ class MetricsService:
     - Quality metrics (field completeness)
     """
 
-    # Bedrock Claude 3 Haiku pricing (us-east-1)
+    # Bedrock Claude 3 Haiku pricing (us-east-1), the default model
     INPUT_TOKEN_PRICE = 0.00025 / 1000  # $0.25 per 1M tokens
     OUTPUT_TOKEN_PRICE = 0.00125 / 1000  # $1.25 per 1M tokens
 
+    # Per-token (input, output) prices by model_id (us-east-1); results record the
+    # model they were extracted with, so each is costed at its own rate
+    TOKEN_PRICES = {
+        "anthropic.claude-3-haiku-20240307-v1:0": (INPUT_TOKEN_PRICE, OUTPUT_TOKEN_PRICE),
+        "anthropic.claude-3-5-haiku-20241022-v1:0": (0.0008 / 1000, 0.004 / 1000),
+        "anthropic.claude-3-sonnet-20240229-v1:0": (0.003 / 1000, 0.015 / 1000),
+        "anthropic.claude-3-5-sonnet-20240620-v1:0": (0.003 / 1000, 0.015 / 1000),
+    }
+
+    # GSI keyed by prompt_version_shard with extracted_at as sort key
+    PROMPT_VERSION_INDEX = "PromptVersionShardIndex"
+
+    # DynamoDB BatchGetItem limit
+    BATCH_GET_SIZE = 100
+
+    # BatchGetItem calls per chunk while UnprocessedKeys remain, backing off exponentially
+    BATCH_GET_MAX_ATTEMPTS = 5
+    BATCH_GET_BACKOFF_SECONDS = 0.05
+
     def __init__(self, dynamodb_table_name: str = None):
         if dynamodb_table_name is None:
             dynamodb_table_name = os.environ.get("DYNAMODB_TABLE", "medextract-results")
-        self.dynamodb = boto3.resource("dynamodb")
+        # One pooled connection per concurrent shard query
+        self.dynamodb = boto3.resource(
+            "dynamodb", config=Config(max_pool_connections=PROMPT_VERSION_SHARDS)
+        )
         self.table = self.dynamodb.Table(dynamodb_table_name)
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def calculate_cost(
+        self, input_tokens: int, output_tokens: int, model_id: Optional[str] = None
+    ) -> float:
         """
         Calculate actual AWS Bedrock cost for a request
 
         Args:
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
+            model_id: Bedrock model used (default and unknown models use Haiku pricing)
 
         Returns:
             Cost in USD
         """
-        input_cost = input_tokens * self.INPUT_TOKEN_PRICE
-        output_cost = output_tokens * self.OUTPUT_TOKEN_PRICE
-        return round(input_cost + output_cost, 6)
+        input_price, output_price = self.TOKEN_PRICES.get(
+            model_id, (self.INPUT_TOKEN_PRICE, self.OUTPUT_TOKEN_PRICE)
+        )
+        return round(input_tokens * input_price + output_tokens * output_price, 6)
 
     def calculate_field_completeness(self, medical_data: Dict[str, Any]) -> tuple[float, int]:
         """
@@ -172,6 +224,92 @@ class MetricsService:
         completeness = (populated_fields / total_fields) * 100
         return round(completeness, 2), populated_fields
 
+    def _query_prompt_version(
+        self, prompt_version: str, start_date: datetime, end_date: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Query results for a prompt version extracted within a time range
+
+        Queries every shard of the prompt version in parallel and merges them.
+
+        Args:
+            prompt_version: Prompt version to query
+            start_date: Start of time range (inclusive)
+            end_date: End of time range (inclusive)
+
+        Returns:
+            Index items (keys plus projected metric attributes)
+        """
+        shard_keys = [f"{prompt_version}#{shard:x}" for shard in range(PROMPT_VERSION_SHARDS)]
+        time_range = Key("extracted_at").between(start_date.isoformat(), end_date.isoformat())
+
+        with ThreadPoolExecutor(max_workers=PROMPT_VERSION_SHARDS) as executor:
+            pages = executor.map(
+                lambda shard_key: self._query_shard(shard_key, time_range), shard_keys
+            )
+            return [item for items in pages for item in items]
+
+    def _query_shard(self, shard_key: str, time_range) -> List[Dict[str, Any]]:
+        """Query one PromptVersionShardIndex shard, following pagination"""
+        # Clients are thread-safe (resources are not); the resource's client keeps
+        # the high-level condition and type (de)serialization
+        client = self.table.meta.client
+        query_kwargs = {
+            "TableName": self.table.name,
+            "IndexName": self.PROMPT_VERSION_INDEX,
+            "KeyConditionExpression": Key("prompt_version_shard").eq(shard_key) & time_range,
+        }
+
+        items = []
+        while True:
+            response = client.query(**query_kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _get_medical_data(self, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch medical_data for documents from the base table
+
+        Args:
+            document_ids: Documents to fetch
+
+        Returns:
+            Mapping of document_id to medical_data (documents without it, or still
+            unprocessed after BATCH_GET_MAX_ATTEMPTS, are omitted)
+        """
+        medical_data_by_id = {}
+        table_name = self.table.name
+
+        for i in range(0, len(document_ids), self.BATCH_GET_SIZE):
+            request_items = {
+                table_name: {
+                    "Keys": [
+                        {"document_id": document_id}
+                        for document_id in document_ids[i : i + self.BATCH_GET_SIZE]
+                    ],
+                    "ProjectionExpression": "document_id, medical_data",
+                }
+            }
+            for attempt in range(self.BATCH_GET_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(self.BATCH_GET_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get("Responses", {}).get(table_name, []):
+                    if item.get("medical_data"):
+                        medical_data_by_id[item["document_id"]] = item["medical_data"]
+                request_items = response.get("UnprocessedKeys")
+                if not request_items:
+                    break
+            else:
+                logger.warning(
+                    f"Skipping {len(request_items[table_name]['Keys'])} unprocessed keys "
+                    f"after {self.BATCH_GET_MAX_ATTEMPTS} BatchGetItem attempts"
+                )
+
+        return medical_data_by_id
+
     def get_prompt_metrics(
         self,
         prompt_version: str,
@@ -195,26 +333,8 @@ class MetricsService:
             start_date = end_date - timedelta(days=7)
 
         try:
-            # Query DynamoDB for all results with this prompt version
-            response = self.table.scan(
-                FilterExpression="prompt_version = :version",
-                ExpressionAttributeValues={":version": prompt_version},
-            )
-
-            items = response.get("Items", [])
-
-            if not items:
-                logger.warning(f"No data found for prompt version: {prompt_version}")
-                return None
-
-            # Filter by date range
-            filtered_items = []
-            for item in items:
-                extracted_at = item.get("extracted_at")
-                if extracted_at:
-                    item_date = datetime.fromisoformat(extracted_at.replace("Z", "+00:00"))
-                    if start_date <= item_date <= end_date:
-                        filtered_items.append(item)
+            # Range query on the prompt version index (only the requested window is read)
+            filtered_items = self._query_prompt_version(prompt_version, start_date, end_date)
 
             if not filtered_items:
                 logger.warning(f"No data in date range for {prompt_version}")
@@ -232,21 +352,29 @@ class MetricsService:
 
             input_tokens = []
             output_tokens = []
+            total_cost = 0.0
             for item in successful:
                 if "token_usage" in item:
                     token_usage = item["token_usage"]
                     if isinstance(token_usage, dict):
-                        input_tokens.append(int(token_usage.get("input_tokens", 0)))
-                        output_tokens.append(int(token_usage.get("output_tokens", 0)))
-
-            # Field completeness
+                        item_input = int(token_usage.get("input_tokens", 0))
+                        item_output = int(token_usage.get("output_tokens", 0))
+                        input_tokens.append(item_input)
+                        output_tokens.append(item_output)
+                        total_cost += self.calculate_cost(
+                            item_input, item_output, item.get("model_id")
+                        )
+
+            # Field completeness (medical_data is not projected into the index)
             completeness_scores = []
             fields_extracted = []
-            for item in successful:
-                if "medical_data" in item:
-                    completeness, fields = self.calculate_field_completeness(item["medical_data"])
-                    completeness_scores.append(completeness)
-                    fields_extracted.append(fields)
+            medical_data_by_id = self._get_medical_data(
+                [item["document_id"] for item in successful]
+            )
+            for medical_data in medical_data_by_id.values():
+                completeness, fields = self.calculate_field_completeness(medical_data)
+                completeness_scores.append(completeness)
+                fields_extracted.append(fields)
 
             # Calculate percentiles
             processing_times_sorted = sorted(processing_times) if processing_times else [0]
@@ -254,10 +382,9 @@ class MetricsService:
             p95_idx = int(len(processing_times_sorted) * 0.95)
             p99_idx = int(len(processing_times_sorted) * 0.99)
 
-            # Cost calculation
+            # Token totals (cost is summed per result above, at each result's model price)
             total_input = sum(input_tokens)
             total_output = sum(output_tokens)
-            total_cost = self.calculate_cost(total_input, total_output)
 
             # Time range
             dates = [
@@ -302,6 +429,34 @@ class MetricsService:
             logger.error(f"Failed to calculate metrics for {prompt_version}: {e}")
             return None
 
+    def get_all_prompt_metrics(
+        self, days: int = 7, prompt_versions: Optional[List[str]] = None
+    ) -> List[PromptMetrics]:
+        """
+        Get aggregated metrics for every prompt version over the last N days
+
+        Args:
+            days: Number of days to analyze (default: 7)
+            prompt_versions: Versions to include (default: the shipped prompt files)
+
+        Returns:
+            PromptMetrics for each version with data in the window, sorted by version
+        """
+        if prompt_versions is None:
+            prompt_versions = [file.stem for file in PromptManager.PROMPTS_DIR.glob("v*.txt")]
+
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+
+        all_metrics = []
+        for prompt_version in sorted(prompt_versions):
+            metrics = self.get_prompt_metrics(
+                prompt_version, start_date=start_date, end_date=end_date
+            )
+            if metrics:
+                all_metrics.append(metrics)
+        return all_metrics
+
     def compare_prompts(
         self,
         control_version: str,
@@ -3,14 +3,8 @@ Lambda handler for experiment operations
 """
 
 import logging
-import sys
-import os
 
-sys.path.insert(0, "/opt/python")
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils import (
+from ..utils import (
     create_response,
     create_error_response,
     parse_event_body,
@@ -21,7 +15,15 @@ from app.services.experiment_service import ExperimentService
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-experiment_service = ExperimentService()
+_experiment_service = None
+
+
+def _get_experiment_service() -> ExperimentService:
+    """Return the container-wide ExperimentService, creating it on first use"""
+    global _experiment_service
+    if _experiment_service is None:
+        _experiment_service = ExperimentService()
+    return _experiment_service
 
 
 def handler(event, context):
@@ -35,6 +37,7 @@ def handler(event, context):
     - PUT /experiments/{id} - Update experiment
     """
     try:
+        experiment_service = _get_experiment_service()
         http_method = event.get("httpMethod", "GET")
         experiment_id = get_path_parameter(event, "experiment_id")
 
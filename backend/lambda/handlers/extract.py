@@ -2,39 +2,75 @@
 Lambda handler for ML extraction operations via AWS Bedrock
 """
 
+import hashlib
 import logging
+import tempfile
 import time
 from datetime import datetime
-import sys
 import os
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 
-sys.path.insert(0, "/opt/python")
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils import (
+from ..utils import (
     create_response,
     create_error_response,
     parse_event_body,
     get_path_parameter,
+    loads,
 )
 from app.models.schemas import DocumentStatus
+from app.services.metrics_service import prompt_version_shard
 import boto3
+from botocore.config import Config
 import json
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients directly
+# Initialize AWS clients once per container; keep-alive lets warm invocations
+# reuse the pooled TLS connections instead of re-handshaking
 aws_region = os.environ.get("AWS_REGION", "us-east-1")
-s3_client = boto3.client("s3", region_name=aws_region)
-dynamodb_resource = boto3.resource("dynamodb", region_name=aws_region)
-bedrock_runtime = boto3.client("bedrock-runtime", region_name=aws_region)
+_client_config = Config(retries={"mode": "standard"}, tcp_keepalive=True)
+s3_client = boto3.client("s3", region_name=aws_region, config=_client_config)
+dynamodb_resource = boto3.resource("dynamodb", region_name=aws_region, config=_client_config)
+bedrock_runtime = boto3.client("bedrock-runtime", region_name=aws_region, config=_client_config)
 
 # Get environment variables
 S3_BUCKET = os.environ.get("S3_BUCKET")
 DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE")
+# Note: Using Claude 3 Haiku (not 3.5) as 3.5 requires inference profiles
+BEDROCK_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
+
+results_table = dynamodb_resource.Table(DYNAMODB_TABLE) if DYNAMODB_TABLE else None
+
+# Documents downloaded by this container, keyed by S3 key and the ETag recorded at
+# upload, so a warm container re-extracting the same document (e.g. A/B prompt
+# comparisons) reads it from local disk instead of S3 but never reuses other bytes.
+DOCUMENT_CACHE_DIR = Path(tempfile.gettempdir()) / "documents"
+DOCUMENT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Half of Lambda's default 512MB /tmp
+
+# Placeholder substituted with the S3 document text
+PROMPT_PLACEHOLDER = "{document_content}"
+
+# Bedrock request body serialized once around a sentinel; each call only JSON-escapes
+# the prompt and splices it in
+_PROMPT_SENTINEL = "__PROMPT__"
+_BEDROCK_BODY_PREFIX, _BEDROCK_BODY_SUFFIX = json.dumps(
+    {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 4000,  # Increased for comprehensive extraction
+        "messages": [{"role": "user", "content": _PROMPT_SENTINEL}],
+    },
+    separators=(",", ":"),
+).split(json.dumps(_PROMPT_SENTINEL))
+
+# Prompt versions shipped in the deployment package; anything else falls back to v2.0.0
+_SHIPPED_PROMPT_VERSIONS = frozenset(
+    path.stem for path in (Path(__file__).parent.parent.parent / "prompts").glob("*.txt")
+)
+
+# Prompt templates pre-split around the placeholder, keyed by shipped version
+_PROMPT_CACHE: Dict[str, Tuple[str, ...]] = {}
 
 
 def load_prompt(version: str) -> str:
@@ -140,141 +176,277 @@ Medical Document:
 Return ONLY the JSON object. No markdown, no explanations, no additional commentary."""
 
 
-def handler(event, context):
+def get_prompt_parts(version: str) -> Tuple[str, ...]:
     """
-    Process extraction requests via AWS Bedrock
+    Get the prompt template for a version split around the document placeholder
+
+    Templates ship with the deployment package, so they are loaded and split
+    once per container and reused across warm invocations. Unknown versions
+    resolve to v2.0.0 before the lookup, so client input cannot grow the cache.
+
+    Args:
+        version: Prompt version (e.g., 'v1.0.0', 'v2.0.0')
 
-    Expects path parameter: document_id
-    Optional body: prompt_version
+    Returns:
+        (prefix, suffix) tuple, or a 1-tuple if the template has no placeholder
     """
+    if version not in _SHIPPED_PROMPT_VERSIONS:
+        logger.warning(f"Unknown prompt version {version}, falling back to v2.0.0")
+        version = "v2.0.0"
+
+    parts = _PROMPT_CACHE.get(version)
+    if parts is None:
+        parts = tuple(load_prompt(version).split(PROMPT_PLACEHOLDER, 1))
+        _PROMPT_CACHE[version] = parts
+    return parts
+
+
+def build_bedrock_body(prompt: str) -> str:
+    """Serialize the Bedrock Messages API request for a prompt"""
+    return _BEDROCK_BODY_PREFIX + json.dumps(prompt) + _BEDROCK_BODY_SUFFIX
+
+
+def _cache_document(path: Path, data: bytes) -> None:
+    """Write a document to the local cache, evicting least recently used files over budget"""
     try:
-        document_id = get_path_parameter(event, "document_id")
+        DOCUMENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry)
+            for entry in DOCUMENT_CACHE_DIR.iterdir()
+        )
+        used = sum(size for _, size, _ in entries) + len(data)
+        for _, size, entry in entries:
+            if used <= DOCUMENT_CACHE_MAX_BYTES:
+                break
+            entry.unlink(missing_ok=True)
+            used -= size
+
+        if used <= DOCUMENT_CACHE_MAX_BYTES:
+            partial = path.with_suffix(".part")
+            partial.write_bytes(data)
+            partial.replace(path)
+    except OSError as e:
+        # Caching is best effort; the document was already read from S3
+        logger.warning(f"Could not cache document locally: {e}")
+
+
+def read_document(s3_key: str, etag: Optional[str] = None) -> str:
+    """
+    Read a document's text, from the container's /tmp cache when possible
 
-        if not document_id:
-            return create_error_response(400, "Missing document_id path parameter")
+    Only documents with a recorded ETag are cached, and only when S3 returns
+    that same ETag, so an object rewritten after upload is never served stale.
 
-        logger.info(f"Processing extraction for document: {document_id}")
+    Args:
+        s3_key: S3 object key of the document
+        etag: ETag recorded when the document was uploaded (None: don't cache)
 
-        body = parse_event_body(event)
-        prompt_version = body.get("prompt_version", "v2.0.0")
+    Returns:
+        Document content decoded as UTF-8
+    """
+    if not etag:
+        data = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)["Body"].read()
+        logger.info(f"Retrieved document from S3: {len(data)} bytes")
+        return data.decode("utf-8")
+
+    path = DOCUMENT_CACHE_DIR / hashlib.sha256(f"{s3_key}\0{etag}".encode("utf-8")).hexdigest()
+    try:
+        data = path.read_bytes()
+        path.touch()  # Mark as recently used
+        logger.info(f"Read document from local cache: {len(data)} bytes")
+    except FileNotFoundError:
+        s3_response = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)
+        data = s3_response["Body"].read()
+        logger.info(f"Retrieved document from S3: {len(data)} bytes")
+        if s3_response.get("ETag", "").strip('"') == etag:
+            _cache_document(path, data)
 
-        # Get document metadata from DynamoDB
-        table = dynamodb_resource.Table(DYNAMODB_TABLE)
-        response = table.get_item(Key={"document_id": document_id})
+    return data.decode("utf-8")
+
+
+def extract_document(document_id: str, prompt_version: str) -> Dict[str, Any]:
+    """
+    Run Bedrock extraction for an uploaded document and store the result
 
-        if "Item" not in response:
-            return create_error_response(404, f"Document not found: {document_id}")
+    Args:
+        document_id: Document identifier
+        prompt_version: Prompt version to extract with
+
+    Returns:
+        API Gateway response (also used to report queue message outcomes)
+    """
+    # Get document metadata from DynamoDB
+    table = results_table
+    response = table.get_item(Key={"document_id": document_id})
+
+    if "Item" not in response:
+        return create_error_response(404, f"Document not found: {document_id}")
+
+    result = response["Item"]
+    s3_key = result.get("s3_key")
+    if not s3_key:
+        return create_error_response(400, "Document has no S3 key")
+
+    if result.get("status") == DocumentStatus.PENDING_UPLOAD.value:
+        return create_error_response(409, f"Document upload not complete: {document_id}")
+
+    # Update status to processing
+    table.update_item(
+        Key={"document_id": document_id},
+        UpdateExpression="SET #status = :status",
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues={":status": DocumentStatus.PROCESSING.value},
+    )
+
+    start_ns = time.monotonic_ns()
+
+    try:
+        # Get document content (S3, or /tmp on a warm container)
+        document_content = read_document(s3_key, result.get("s3_etag"))
 
-        result = response["Item"]
-        s3_key = result.get("s3_key")
-        if not s3_key:
-            return create_error_response(400, "Document has no S3 key")
+        # Call Bedrock for extraction (IAM only allows the configured model)
+        model_id = BEDROCK_MODEL_ID
 
-        # Update status to processing
+        # Load prompt template based on version
+        logger.info(f"Using prompt version: {prompt_version}")
+        prompt_parts = get_prompt_parts(prompt_version)
+
+        # Insert document content into prompt
+        prompt = document_content.join(prompt_parts)
+
+        bedrock_response = bedrock_runtime.invoke_model(
+            modelId=model_id, body=build_bedrock_body(prompt)
+        )
+
+        response_body = loads(bedrock_response["body"].read())  # orjson when packaged
+        extracted_text = response_body["content"][0]["text"]
+
+        # Extract token usage for metrics
+        token_usage = {
+            "input_tokens": response_body.get("usage", {}).get("input_tokens", 0),
+            "output_tokens": response_body.get("usage", {}).get("output_tokens", 0),
+        }
+
+        # Try to parse as JSON
+        try:
+            medical_data = json.loads(extracted_text)
+        except:
+            medical_data = {"raw_text": extracted_text}
+
+        processing_time_ms = (time.monotonic_ns() - start_ns) // 1_000_000
+        extracted_at = datetime.utcnow().isoformat()
+
+        # Save results to DynamoDB
         table.update_item(
             Key={"document_id": document_id},
-            UpdateExpression="SET #status = :status",
+            UpdateExpression="SET medical_data = :data, #status = :status, model_id = :model, prompt_version = :version, prompt_version_shard = :shard, processing_time_ms = :time, extracted_at = :timestamp, token_usage = :tokens",
             ExpressionAttributeNames={"#status": "status"},
-            ExpressionAttributeValues={":status": DocumentStatus.PROCESSING.value},
+            ExpressionAttributeValues={
+                ":data": medical_data,
+                ":status": DocumentStatus.COMPLETED.value,
+                ":model": model_id,
+                ":version": prompt_version,
+                ":shard": prompt_version_shard(prompt_version, document_id),
+                ":time": processing_time_ms,
+                ":timestamp": extracted_at,
+                ":tokens": token_usage,
+            },
         )
 
-        start_time = time.time()
+        return create_response(
+            200,
+            {
+                "document_id": document_id,
+                "status": DocumentStatus.COMPLETED.value,
+                "medical_data": medical_data,
+                "processing_time_ms": processing_time_ms,
+                "model_id": model_id,
+                "prompt_version": prompt_version,
+                "token_usage": token_usage,
+                "extracted_at": extracted_at,
+            },
+        )
 
-        try:
-            # Get document content from S3
-            s3_response = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)
-            document_content = s3_response["Body"].read().decode("utf-8")
-            logger.info(f"Retrieved document from S3: {len(document_content)} bytes")
-
-            # Call Bedrock for extraction
-            # Note: Using Claude 3 Haiku (not 3.5) as 3.5 requires inference profiles
-            model_id = "anthropic.claude-3-haiku-20240307-v1:0"
-
-            # Load prompt template based on version
-            logger.info(f"Using prompt version: {prompt_version}")
-            prompt_template = load_prompt(prompt_version)
-
-            # Insert document content into prompt
-            prompt = prompt_template.replace("{document_content}", document_content)
-
-            bedrock_request = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4000,  # Increased for comprehensive extraction
-                "messages": [{"role": "user", "content": prompt}],
-            }
-
-            bedrock_response = bedrock_runtime.invoke_model(
-                modelId=model_id, body=json.dumps(bedrock_request)
-            )
+    except Exception as extraction_error:
+        logger.error(
+            f"Extraction failed for {document_id}: {extraction_error}",
+            exc_info=True,
+        )
 
-            response_body = json.loads(bedrock_response["body"].read())
-            extracted_text = response_body["content"][0]["text"]
-
-            # Extract token usage for metrics
-            token_usage = {
-                "input_tokens": response_body.get("usage", {}).get("input_tokens", 0),
-                "output_tokens": response_body.get("usage", {}).get("output_tokens", 0),
-            }
-
-            # Try to parse as JSON
-            try:
-                medical_data = json.loads(extracted_text)
-            except:
-                medical_data = {"raw_text": extracted_text}
-
-            processing_time_ms = int((time.time() - start_time) * 1000)
-
-            # Save results to DynamoDB
-            table.update_item(
-                Key={"document_id": document_id},
-                UpdateExpression="SET medical_data = :data, #status = :status, model_id = :model, prompt_version = :version, processing_time_ms = :time, extracted_at = :timestamp, token_usage = :tokens",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":data": medical_data,
-                    ":status": DocumentStatus.COMPLETED.value,
-                    ":model": model_id,
-                    ":version": prompt_version,
-                    ":time": processing_time_ms,
-                    ":timestamp": datetime.utcnow().isoformat(),
-                    ":tokens": token_usage,
-                },
-            )
+        processing_time_ms = (time.monotonic_ns() - start_ns) // 1_000_000
 
-            return create_response(
-                200,
-                {
-                    "document_id": document_id,
-                    "status": DocumentStatus.COMPLETED.value,
-                    "medical_data": medical_data,
-                    "processing_time_ms": processing_time_ms,
-                    "model_id": model_id,
-                    "prompt_version": prompt_version,
-                    "token_usage": token_usage,
-                    "extracted_at": datetime.utcnow().isoformat(),
-                },
-            )
+        # Save error to DynamoDB
+        table.update_item(
+            Key={"document_id": document_id},
+            UpdateExpression="SET #status = :status, error_message = :error, processing_time_ms = :time",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":status": DocumentStatus.FAILED.value,
+                ":error": str(extraction_error),
+                ":time": processing_time_ms,
+            },
+        )
+
+        return create_error_response(500, f"Extraction failed: {str(extraction_error)}")
+
+
+def process_queue_messages(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process extraction requests queued by POST /api/extract/{document_id}
 
-        except Exception as extraction_error:
+    API Gateway sends the request body to SQS with the document_id as a message
+    attribute. Messages that are malformed, fail with a server error, or find
+    the document still pending upload (409) are reported back so SQS retries
+    them (and dead-letters them after repeated failures).
+    """
+    failures = []
+    for record in event["Records"]:
+        try:
+            document_id = record["messageAttributes"]["document_id"]["stringValue"]
+            body = parse_event_body(record)
+            prompt_version = body.get("prompt_version", "v2.0.0")
+
+            response = extract_document(document_id, prompt_version)
+        except Exception as e:
             logger.error(
-                f"Extraction failed for {document_id}: {extraction_error}",
+                f"Queued extraction failed for message {record.get('messageId')}: {e}",
                 exc_info=True,
             )
+            response = None
 
-            processing_time_ms = int((time.time() - start_time) * 1000)
-
-            # Save error to DynamoDB
-            table.update_item(
-                Key={"document_id": document_id},
-                UpdateExpression="SET #status = :status, error_message = :error, processing_time_ms = :time",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":status": DocumentStatus.FAILED.value,
-                    ":error": str(extraction_error),
-                    ":time": processing_time_ms,
-                },
-            )
+        if response is None or response["statusCode"] == 409 or response["statusCode"] >= 500:
+            failures.append({"itemIdentifier": record["messageId"]})
+
+    return {"batchItemFailures": failures}
+
+
+def handler(event, context):
+    """
+    Process extraction requests via AWS Bedrock
+
+    Synchronous API calls (POST /api/process/{document_id}, or POST
+    {function_url}/{document_id}) expect document_id in the path and optional
+    body prompt_version. SQS events carry requests queued by
+    POST /api/extract/{document_id}.
+    """
+    if "Records" in event:
+        return process_queue_messages(event)
+
+    try:
+        document_id = get_path_parameter(event, "document_id")
+        if not document_id and "rawPath" in event:
+            # Function URL events have no path parameters; the last segment is the ID
+            document_id = event["rawPath"].rstrip("/").rsplit("/", 1)[-1] or None
+
+        if not document_id:
+            return create_error_response(400, "Missing document_id path parameter")
+
+        logger.info(f"Processing extraction for document: {document_id}")
+
+        body = parse_event_body(event)
+        prompt_version = body.get("prompt_version", "v2.0.0")
 
-            return create_error_response(500, f"Extraction failed: {str(extraction_error)}")
+        return extract_document(document_id, prompt_version)
 
     except Exception as e:
         logger.error(f"Handler error: {e}", exc_info=True)
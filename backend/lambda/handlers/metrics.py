@@ -3,20 +3,73 @@ Lambda handler for metrics operations
 """
 
 import logging
-import sys
-import os
+from datetime import datetime, timedelta
+from operator import attrgetter
 
-sys.path.insert(0, "/opt/python")
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils import create_response, create_error_response, get_query_parameter
-from app.services.metrics_service import MetricsService
+from ..utils import (
+    create_response,
+    create_error_response,
+    parse_event_body,
+    get_query_parameter,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-metrics_service = MetricsService()
+# PromptMetrics fields returned verbatim by GET /api/metrics/prompts/{version}
+_PROMPT_METRIC_FIELDS = (
+    "prompt_version",
+    "total_requests",
+    "successful_requests",
+    "failed_requests",
+    "success_rate",
+    "avg_processing_time_ms",
+    "p50_processing_time_ms",
+    "p95_processing_time_ms",
+    "p99_processing_time_ms",
+    "total_input_tokens",
+    "total_output_tokens",
+    "total_cost_usd",
+    "avg_cost_per_request",
+    "avg_field_completeness",
+    "avg_fields_extracted",
+)
+
+# Summary fields per row for GET /api/metrics, fetched with one attrgetter call
+_SUMMARY_METRIC_FIELDS = (
+    "prompt_version",
+    "total_requests",
+    "success_rate",
+    "avg_processing_time_ms",
+    "total_cost_usd",
+    "avg_field_completeness",
+)
+_get_summary_fields = attrgetter(*_SUMMARY_METRIC_FIELDS)
+
+# Imported and created on first use (each route needs only one of them) and
+# reused across warm invocations
+_metrics_service = None
+_cloudwatch_service = None
+
+
+def _get_metrics_service():
+    """Return the container-wide MetricsService, creating it on first use"""
+    global _metrics_service
+    if _metrics_service is None:
+        from app.services.metrics_service import MetricsService
+
+        _metrics_service = MetricsService()
+    return _metrics_service
+
+
+def _get_cloudwatch_service():
+    """Return the container-wide CloudWatchService, creating it on first use"""
+    global _cloudwatch_service
+    if _cloudwatch_service is None:
+        from app.services.cloudwatch_service import CloudWatchService
+
+        _cloudwatch_service = CloudWatchService()
+    return _cloudwatch_service
 
 
 def handler(event, context):
@@ -33,15 +86,12 @@ def handler(event, context):
         return create_response(200, {"message": "OK"})
 
     try:
-        logger.info(f"Metrics request received: {event.get('httpMethod')} {event.get('path')}")
+        logger.info("Metrics request received: %s %s", event.get("httpMethod"), event.get("path"))
 
         # Handle POST /api/metrics/compare
         if event.get("httpMethod") == "POST" and "compare" in event.get("path", ""):
             logger.info("Handling comparison request")
-            body = event.get("body", "{}")
-            import json
-
-            data = json.loads(body) if isinstance(body, str) else body
+            data = parse_event_body(event)
 
             control_version = data.get("control_version")
             treatment_version = data.get("treatment_version")
@@ -56,11 +106,14 @@ def handler(event, context):
                 )
 
             logger.info(
-                f"Comparing {control_version} vs {treatment_version} at {confidence_level*100}% confidence"
+                "Comparing %s vs %s at %s%% confidence",
+                control_version,
+                treatment_version,
+                confidence_level * 100,
             )
 
             try:
-                result = metrics_service.compare_prompts(
+                result = _get_metrics_service().compare_prompts(
                     control_version=control_version,
                     treatment_version=treatment_version,
                     confidence_level=confidence_level,
@@ -94,14 +147,12 @@ def handler(event, context):
                     },
                 )
             except Exception as e:
-                logger.error(f"Comparison failed: {str(e)}", exc_info=True)
+                logger.error("Comparison failed: %s", e, exc_info=True)
                 return create_error_response(500, f"Comparison failed: {str(e)}")
 
         # Handle GET /api/lambda/metrics - CloudWatch Lambda metrics
         if event.get("httpMethod") == "GET" and "/lambda/metrics" in event.get("path", ""):
             logger.info("Handling Lambda metrics request")
-            from app.services.cloudwatch_service import CloudWatchService
-
             hours_str = get_query_parameter(event, "hours", "24")
             try:
                 hours = int(hours_str)
@@ -109,8 +160,7 @@ def handler(event, context):
                 return create_error_response(400, "Invalid 'hours' parameter, must be integer")
 
             try:
-                cloudwatch_service = CloudWatchService()
-                metrics = cloudwatch_service.get_lambda_metrics(hours=hours)
+                metrics = _get_cloudwatch_service().get_lambda_metrics(hours=hours)
 
                 metrics_list = [
                     {
@@ -130,7 +180,7 @@ def handler(event, context):
 
                 return create_response(200, metrics_list)
             except Exception as e:
-                logger.error(f"Failed to get Lambda metrics: {str(e)}", exc_info=True)
+                logger.error("Failed to get Lambda metrics: %s", e, exc_info=True)
                 return create_error_response(500, f"Failed to get Lambda metrics: {str(e)}")
 
         # Extract version from path parameter if present
@@ -144,79 +194,54 @@ def handler(event, context):
             return create_error_response(400, "Invalid 'days' parameter, must be integer")
 
         if prompt_version:
-            logger.info(f"Getting metrics for prompt version: {prompt_version}")
+            logger.info("Getting metrics for prompt version: %s", prompt_version)
 
             # Calculate start_date from days parameter
-            from datetime import datetime, timedelta
-
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days)
 
-            logger.info(f"Querying metrics from {start_date} to {end_date}")
+            logger.info("Querying metrics from %s to %s", start_date, end_date)
 
             try:
-                metrics = metrics_service.get_prompt_metrics(
+                metrics = _get_metrics_service().get_prompt_metrics(
                     prompt_version, start_date=start_date, end_date=end_date
                 )
             except Exception as e:
-                logger.error(f"Exception in get_prompt_metrics: {str(e)}", exc_info=True)
+                logger.error("Exception in get_prompt_metrics: %s", e, exc_info=True)
                 return create_error_response(500, f"Failed to retrieve metrics: {str(e)}")
 
             if not metrics:
                 logger.warning(
-                    f"No metrics returned for {prompt_version} in date range {start_date} to {end_date}"
+                    "No metrics returned for %s in date range %s to %s",
+                    prompt_version,
+                    start_date,
+                    end_date,
                 )
                 return create_error_response(
                     404, f"No metrics found for prompt version: {prompt_version}"
                 )
 
-            return create_response(
-                200,
-                {
-                    "prompt_version": metrics.prompt_version,
-                    "total_requests": metrics.total_requests,
-                    "successful_requests": metrics.successful_requests,
-                    "failed_requests": metrics.failed_requests,
-                    "success_rate": metrics.success_rate,
-                    "avg_processing_time_ms": metrics.avg_processing_time_ms,
-                    "p50_processing_time_ms": metrics.p50_processing_time_ms,
-                    "p95_processing_time_ms": metrics.p95_processing_time_ms,
-                    "p99_processing_time_ms": metrics.p99_processing_time_ms,
-                    "total_input_tokens": metrics.total_input_tokens,
-                    "total_output_tokens": metrics.total_output_tokens,
-                    "total_cost_usd": metrics.total_cost_usd,
-                    "avg_cost_per_request": metrics.avg_cost_per_request,
-                    "avg_field_completeness": metrics.avg_field_completeness,
-                    "avg_fields_extracted": metrics.avg_fields_extracted,
-                    "first_request": (
-                        metrics.first_request.isoformat() if metrics.first_request else None
-                    ),
-                    "last_request": (
-                        metrics.last_request.isoformat() if metrics.last_request else None
-                    ),
-                },
+            response_body = {field: getattr(metrics, field) for field in _PROMPT_METRIC_FIELDS}
+            response_body["first_request"] = (
+                metrics.first_request.isoformat() if metrics.first_request else None
             )
+            response_body["last_request"] = (
+                metrics.last_request.isoformat() if metrics.last_request else None
+            )
+
+            return create_response(200, response_body)
         else:
-            logger.info(f"Getting all prompt metrics for last {days} days")
-            all_metrics = metrics_service.get_all_prompt_metrics(days=days)
+            logger.info("Getting all prompt metrics for last %d days", days)
+            all_metrics = _get_metrics_service().get_all_prompt_metrics(days=days)
 
-            metrics_list = []
-            for m in all_metrics:
-                metrics_list.append(
-                    {
-                        "prompt_version": m.prompt_version,
-                        "total_requests": m.total_requests,
-                        "success_rate": m.success_rate,
-                        "avg_processing_time_ms": m.avg_processing_time_ms,
-                        "total_cost_usd": m.total_cost_usd,
-                        "avg_field_completeness": m.avg_field_completeness,
-                    }
-                )
+            metrics_list = [
+                dict(zip(_SUMMARY_METRIC_FIELDS, _get_summary_fields(m))) for m in all_metrics
+            ]
 
             return create_response(
                 200, {"metrics": metrics_list, "count": len(metrics_list), "days": days}
             )
 
     except Exception as e:
-        logger.error(f"Metrics handler error: {e}", exc_info=True)
+        logger.error("Metrics handler error: %s", e, exc_info=True)
         return create_error_response(500, f"Failed to retrieve metrics: {str(e)}")
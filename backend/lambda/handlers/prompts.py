@@ -2,67 +2,66 @@
 Lambda handler for prompt version management
 """
 
-import json
 import logging
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-# Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from ..utils import create_response, create_error_response
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
-def get_query_parameter(event: Dict[str, Any], param_name: str, default: str = None) -> str:
-    """Extract query parameter from API Gateway event"""
-    query_params = event.get("queryStringParameters") or {}
-    return query_params.get(param_name, default)
+# Prompts ship with the deployment package, so the scan is done once per container
+_VERSIONS_CACHE: Optional[List[str]] = None
 
+# GET /api/prompts/versions is byte-identical for the container's lifetime
+_VERSIONS_RESPONSE: Optional[Dict[str, Any]] = None
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    """Create API Gateway response with CORS headers"""
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type",
-        },
-        "body": json.dumps(body),
-    }
 
+def list_prompt_versions() -> list:
+    """
+    Return available prompt versions, scanning the prompts directory on first call
 
-def create_error_response(status_code: int, message: str) -> Dict[str, Any]:
-    """Create error response"""
-    return create_response(status_code, {"error": "Error", "message": message})
+    Returns:
+        List of version strings (e.g., ['v1.0.0', 'v1.1.0', 'v2.0.0'])
+    """
+    global _VERSIONS_CACHE
+    if _VERSIONS_CACHE is None:
+        _VERSIONS_CACHE = _scan_prompt_versions()
+    return _VERSIONS_CACHE
 
 
-def list_prompt_versions() -> list:
+def _scan_prompt_versions() -> list:
     """
     Scan the prompts directory and return available versions
 
     Returns:
-        List of version strings (e.g., ['v1.0.0', 'v1.1.0', 'v2.0.0'])
+        Sorted list of version strings
     """
     # Get the prompts directory relative to this file
     handler_dir = Path(__file__).parent
     prompts_dir = handler_dir.parent.parent / "prompts"
 
-    logger.info(f"Scanning prompts directory: {prompts_dir}")
+    logger.info("Scanning prompts directory: %s", prompts_dir)
 
     if not prompts_dir.exists():
-        logger.error(f"Prompts directory not found: {prompts_dir}")
+        logger.error("Prompts directory not found: %s", prompts_dir)
         return []
 
     versions = []
-
-    # Scan for .txt files in prompts directory
-    for file_path in prompts_dir.glob("*.txt"):
-        # Extract version from filename (e.g., "v1.0.0.txt" -> "v1.0.0")
-        version = file_path.stem
-        versions.append(version)
-        logger.info(f"Found prompt version: {version}")
+    log_each = logger.isEnabledFor(logging.DEBUG)
+
+    # Scan for .txt files in prompts directory (scandir uses dirent types, no per-file stat)
+    with os.scandir(prompts_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt") or not entry.is_file(follow_symlinks=False):
+                continue
+            # Extract version from filename (e.g., "v1.0.0.txt" -> "v1.0.0")
+            version = entry.name[:-4]
+            versions.append(version)
+            if log_each:
+                logger.debug("Found prompt version: %s", version)
 
     # Sort versions (v1.0.0, v1.1.0, v2.0.0, etc.)
     versions.sort()
@@ -87,6 +86,31 @@ def get_default_version(versions: list) -> str:
     return versions[-1]
 
 
+def get_versions_response() -> Dict[str, Any]:
+    """
+    Return the API Gateway response listing prompt versions, built on first call
+
+    Returns:
+        Cached API Gateway response (treat as read-only)
+    """
+    global _VERSIONS_RESPONSE
+    if _VERSIONS_RESPONSE is None:
+        versions = list_prompt_versions()
+        default_version = get_default_version(versions)
+
+        logger.info("Caching %d prompt versions, default: %s", len(versions), default_version)
+
+        _VERSIONS_RESPONSE = create_response(
+            200,
+            {
+                "versions": versions,
+                "default_version": default_version,
+                "total_count": len(versions),
+            },
+        )
+    return _VERSIONS_RESPONSE
+
+
 def handler(event, context):
     """
     Process prompt version requests
@@ -95,27 +119,15 @@ def handler(event, context):
     - GET /api/prompts/versions - List all available prompt versions
     """
     try:
-        logger.info(f"Prompts request received: {event.get('httpMethod')} {event.get('path')}")
+        logger.info("Prompts request received: %s %s", event.get("httpMethod"), event.get("path"))
 
         # Handle GET /api/prompts/versions
         if event.get("httpMethod") == "GET":
-            versions = list_prompt_versions()
-            default_version = get_default_version(versions)
-
-            logger.info(f"Returning {len(versions)} prompt versions, default: {default_version}")
-
-            return create_response(
-                200,
-                {
-                    "versions": versions,
-                    "default_version": default_version,
-                    "total_count": len(versions),
-                },
-            )
+            return get_versions_response()
 
         # Unsupported method
         return create_error_response(405, "Method not allowed")
 
     except Exception as e:
-        logger.error(f"Error processing prompts request: {str(e)}", exc_info=True)
+        logger.error("Error processing prompts request: %s", e, exc_info=True)
         return create_error_response(500, f"Internal server error: {str(e)}")
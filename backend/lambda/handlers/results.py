@@ -0,0 +1,90 @@
+"""
+Lambda handler for retrieving extraction results
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+
+from ..utils import create_response, create_error_response, get_path_parameter
+from app.models.schemas import DocumentStatus
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+dynamodb_client = boto3.client("dynamodb", config=Config(tcp_keepalive=True))
+deserializer = TypeDeserializer()
+
+DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE")
+
+# Read-through cache of completed results, per container. Dashboards re-read the
+# same completed documents; serving them from memory saves a full-item read each.
+# A document can be re-extracted, so a cached result may be up to
+# RESULT_CACHE_TTL_SECONDS stale afterwards. Failed and in-progress documents are
+# never cached, so polling still sees every status change.
+RESULT_CACHE_TTL_SECONDS = 60
+RESULT_CACHE_MAX_ENTRIES = 1024
+_result_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def get_result(document_id: str):
+    """
+    Get a result item, from the container cache when it is fresh
+
+    Args:
+        document_id: Document identifier
+
+    Returns:
+        Deserialized item, or None if the document does not exist
+    """
+    cached = _result_cache.get(document_id)
+    if cached and cached[0] > time.monotonic():
+        _result_cache.move_to_end(document_id)
+        return cached[1]
+
+    response = dynamodb_client.get_item(
+        TableName=DYNAMODB_TABLE, Key={"document_id": {"S": document_id}}
+    )
+    if "Item" not in response:
+        _result_cache.pop(document_id, None)
+        return None
+
+    result = {key: deserializer.deserialize(value) for key, value in response["Item"].items()}
+
+    if result.get("status") == DocumentStatus.COMPLETED.value:
+        _result_cache[document_id] = (time.monotonic() + RESULT_CACHE_TTL_SECONDS, result)
+        _result_cache.move_to_end(document_id)
+        if len(_result_cache) > RESULT_CACHE_MAX_ENTRIES:
+            _result_cache.popitem(last=False)
+    else:
+        _result_cache.pop(document_id, None)
+
+    return result
+
+
+def handler(event, context):
+    """
+    Process result requests
+
+    Supports:
+    - GET /api/results/{document_id} - Poll status and results of an extraction
+    """
+    try:
+        document_id = get_path_parameter(event, "document_id")
+        if not document_id:
+            return create_error_response(400, "Missing document_id path parameter")
+
+        result = get_result(document_id)
+        if result is None:
+            return create_error_response(404, f"Document not found: {document_id}")
+
+        return create_response(200, result)
+
+    except Exception as e:
+        logger.error("Results handler error: %s", e, exc_info=True)
+        return create_error_response(500, f"Failed to retrieve results: {str(e)}")
@@ -0,0 +1,52 @@
+"""
+Router Lambda Handler
+
+Single entry point for the lightweight API routes (upload, results, metrics,
+prompts, experiments) so they share one pool of warm execution environments.
+Each route is still implemented by its own handler module.
+"""
+
+import logging
+
+from . import experiment, metrics, prompts, results, upload
+from ..utils import create_error_response
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# First path segment under /api -> route handler
+ROUTES = {
+    "upload": upload.handler,
+    "metrics": metrics.handler,
+    "lambda": metrics.handler,  # /api/lambda/metrics
+    "prompts": prompts.handler,
+    "experiments": experiment.handler,
+    "results": results.handler,
+}
+
+
+def resolve_route(resource: str):
+    """Return the handler for an API Gateway resource path, or None"""
+    parts = resource.strip("/").split("/")
+    if len(parts) < 2 or parts[0] != "api":
+        return None
+    return ROUTES.get(parts[1])
+
+
+def handler(event, context):
+    """
+    Dispatch an API Gateway or S3 event to its route handler
+
+    S3 ObjectCreated notifications (pre-signed uploads) go to the upload handler;
+    API Gateway events are routed on their resource path.
+    """
+    if "Records" in event:
+        return upload.handler(event, context)
+
+    resource = event.get("resource") or event.get("path") or ""
+    route = resolve_route(resource)
+    if route is None:
+        logger.warning("No route for resource: %s", resource)
+        return create_error_response(404, f"Route not found: {resource}")
+
+    return route(event, context)
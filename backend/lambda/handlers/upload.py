@@ -4,102 +4,373 @@ Lambda handler for document upload operations
 
 import logging
 import base64
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import sys
+from pathlib import PurePosixPath
+from typing import Optional
+from urllib.parse import unquote_plus
 import os
 
-sys.path.insert(0, "/opt/python")
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
-# Add parent directory to path to import utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils import create_response, create_error_response, parse_event_body
+from ..utils import create_response, create_error_response, parse_event_body, get_query_parameter
 from app.models.schemas import DocumentStatus
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Initialize AWS clients directly (avoid S3Service bucket check)
-s3_client = boto3.client("s3")
-dynamodb_client = boto3.client("dynamodb")
-dynamodb_resource = boto3.resource("dynamodb")
+# Pool sized so the concurrent S3/DynamoDB writes below each have a warm connection;
+# keep-alive and short timeouts with standard-mode retries fail fast on transient errors
+_client_config = Config(
+    retries={"max_attempts": 2, "mode": "standard"},
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=10,
+)
+s3_client = boto3.client("s3", config=_client_config)
+dynamodb_client = boto3.client("dynamodb", config=_client_config)
+
+# Pre-signed URLs go through the S3 Transfer Acceleration edge endpoint when the
+# bucket has it enabled; signing is local, so this client never makes a request
+S3_ACCELERATE = os.environ.get("S3_ACCELERATE", "false").lower() == "true"
+presign_client = (
+    boto3.client("s3", config=_client_config.merge(Config(s3={"use_accelerate_endpoint": True})))
+    if S3_ACCELERATE
+    else s3_client
+)
+
+# Reused across warm invocations to run the independent S3 and DynamoDB writes together
+_executor = ThreadPoolExecutor(max_workers=2)
 
 # Get environment variables
 S3_BUCKET = os.environ.get("S3_BUCKET")
 DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE")
 
+MAX_FILE_SIZE_MB = 10
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+PRESIGNED_URL_EXPIRY_SECONDS = 300
+
+ALLOWED_EXTENSIONS = frozenset({".pdf", ".txt", ".doc", ".docx"})
+_ALLOWED_EXTENSIONS_STR = ", ".join(sorted(ALLOWED_EXTENSIONS))
+
+
+def validate_file_extension(filename: str):
+    """
+    Check the filename against the supported document types
+
+    Args:
+        filename: Uploaded filename
+
+    Returns:
+        Error response if the type is not supported, otherwise None
+    """
+    dot = filename.rfind(".")
+    file_ext = filename[dot:].lower() if dot >= 0 else ""
+
+    if file_ext not in ALLOWED_EXTENSIONS:
+        return create_error_response(
+            400,
+            f"File type not supported. Allowed: {_ALLOWED_EXTENSIONS_STR}",
+        )
+
+    return None
+
+
+def build_object_key(document_id: str, filename: str, timestamp: str) -> str:
+    """
+    Build the S3 key for a document
+
+    A short hash of the document ID follows the documents/ prefix so objects
+    spread across S3 partitions instead of piling onto one timestamp-ordered
+    key range. The documents/ prefix is kept for the upload notification filter.
+    Directory components of the filename are dropped, so the key always has
+    exactly three segments.
+
+    Args:
+        document_id: Document identifier
+        filename: Original filename
+        timestamp: Upload time as YYYYmmdd_HHMMSS
+
+    Returns:
+        Key of the form documents/{shard}/{timestamp}_{document_id}_{filename}
+    """
+    shard = hashlib.blake2b(document_id.encode("utf-8"), digest_size=2).hexdigest()
+    name = PurePosixPath(filename).name
+    return f"documents/{shard}/{timestamp}_{document_id}_{name}"
+
+
+def create_presigned_upload(filename: str):
+    """
+    Register a pending document and return a pre-signed S3 PUT URL for it
+
+    The client uploads the file bytes straight to S3; the S3 ObjectCreated
+    notification then marks the document as uploaded (see confirm_s3_uploads).
+
+    Args:
+        filename: Original filename (extension already validated)
+
+    Returns:
+        API Gateway response with document_id, s3_key and upload_url
+    """
+    document_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    uploaded_at = now.isoformat()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    s3_key = build_object_key(document_id, filename, timestamp)
+
+    upload_url = presign_client.generate_presigned_url(
+        "put_object",
+        Params={
+            "Bucket": S3_BUCKET,
+            "Key": s3_key,
+            "ContentType": "application/octet-stream",
+        },
+        ExpiresIn=PRESIGNED_URL_EXPIRY_SECONDS,
+    )
+
+    dynamodb_client.put_item(
+        TableName=DYNAMODB_TABLE,
+        Item={
+            "document_id": {"S": document_id},
+            "filename": {"S": filename},
+            "s3_key": {"S": s3_key},
+            "status": {"S": DocumentStatus.PENDING_UPLOAD.value},
+            "uploaded_at": {"S": uploaded_at},
+        },
+    )
+    logger.info("Issued pre-signed upload URL for %s: %s", document_id, s3_key)
+
+    return create_response(
+        200,
+        {
+            "document_id": document_id,
+            "filename": filename,
+            "s3_key": s3_key,
+            "upload_url": upload_url,
+            # The URL is signed for this Content-Type; the PUT must send it unchanged
+            "upload_headers": {"Content-Type": "application/octet-stream"},
+            "expires_in": PRESIGNED_URL_EXPIRY_SECONDS,
+            "uploaded_at": uploaded_at,
+            "status": DocumentStatus.PENDING_UPLOAD.value,
+        },
+    )
+
+
+def confirm_s3_uploads(event):
+    """
+    Mark pre-signed uploads as uploaded from an S3 ObjectCreated notification
+
+    Keys follow documents/{shard}/{date}_{time}_{document_id}_{filename}
+    (older keys have no shard segment). Documents
+    uploaded through the base64 path are already UPLOADED, so the conditional
+    update skips them.
+
+    A pre-signed PUT cannot cap the object size, so objects over
+    MAX_FILE_SIZE_BYTES are deleted here and their document marked failed.
+
+    Args:
+        event: S3 event notification
+
+    Returns:
+        Summary of confirmed and rejected documents
+    """
+    confirmed = 0
+    rejected = 0
+
+    for record in event.get("Records", []):
+        s3_object = record.get("s3", {}).get("object", {})
+        s3_key = unquote_plus(s3_object.get("key", ""))
+        # Split after documents/{shard}/ only: keys issued before filenames were
+        # sanitized may contain "/" in the filename
+        parts = s3_key.split("/", 2)[-1].split("_", 3)
+
+        if len(parts) < 4:
+            logger.warning("Skipping S3 object with unexpected key: %s", s3_key)
+            continue
+
+        document_id = parts[2]
+        size = int(s3_object.get("size", 0))
+
+        if size > MAX_FILE_SIZE_BYTES:
+            reject_oversized_upload(document_id, s3_key, s3_object.get("versionId"), size)
+            rejected += 1
+            continue
+
+        try:
+            dynamodb_client.update_item(
+                TableName=DYNAMODB_TABLE,
+                Key={"document_id": {"S": document_id}},
+                UpdateExpression=(
+                    "SET #status = :uploaded, file_size_bytes = :size, s3_etag = :etag"
+                ),
+                ConditionExpression="#status = :pending",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":uploaded": {"S": DocumentStatus.UPLOADED.value},
+                    ":pending": {"S": DocumentStatus.PENDING_UPLOAD.value},
+                    ":size": {"N": str(size)},
+                    # Keys the extract function's document cache
+                    ":etag": {"S": s3_object.get("eTag", "")},
+                },
+            )
+            confirmed += 1
+            logger.info("Confirmed pre-signed upload: %s", document_id)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    return {"confirmed": confirmed, "rejected": rejected}
+
+
+def reject_oversized_upload(document_id: str, s3_key: str, version_id: Optional[str], size: int):
+    """
+    Delete a pre-signed upload over the size limit and mark its document failed
+
+    Only the oversized object version is deleted, so a re-PUT to the same
+    pre-signed URL can't hide the document's earlier, valid upload. The status
+    only changes while the document is still pending upload.
+
+    Args:
+        document_id: Document identifier
+        s3_key: S3 key of the uploaded object
+        version_id: S3 version of the oversized object (None if unversioned)
+        size: Object size in bytes
+    """
+    logger.warning("Rejecting oversized upload %s: %d bytes", document_id, size)
+    version_kwargs = {"VersionId": version_id} if version_id else {}
+    s3_client.delete_object(Bucket=S3_BUCKET, Key=s3_key, **version_kwargs)
+
+    try:
+        dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE,
+            Key={"document_id": {"S": document_id}},
+            UpdateExpression="SET #status = :failed, error_message = :error",
+            ConditionExpression="#status = :pending",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":failed": {"S": DocumentStatus.FAILED.value},
+                ":pending": {"S": DocumentStatus.PENDING_UPLOAD.value},
+                ":error": {"S": f"File too large. Maximum size: {MAX_FILE_SIZE_MB}MB"},
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.warning("Kept status of %s: no longer pending upload", document_id)
+
 
 def handler(event, context):
     """
     Process document upload requests
 
-    Expects multipart/form-data with base64 encoded file
+    Expects a JSON body with a base64 encoded file, or with only a filename
+    when called with ?mode=presign (the client then PUTs to the returned URL).
+    Also receives S3 ObjectCreated notifications for pre-signed uploads.
     """
+    if "Records" in event:
+        return confirm_s3_uploads(event)
+
     try:
-        logger.info(f"Upload request received: {event.get('requestContext', {}).get('requestId')}")
+        logger.info(
+            "Upload request received: %s", event.get("requestContext", {}).get("requestId")
+        )
 
         body = parse_event_body(event)
 
+        if get_query_parameter(event, "mode") == "presign":
+            filename = body.get("filename")
+            if not filename:
+                return create_error_response(400, "Missing required field: filename")
+
+            error_response = validate_file_extension(filename)
+            if error_response:
+                return error_response
+
+            return create_presigned_upload(filename)
+
         if not body.get("file_content") or not body.get("filename"):
             return create_error_response(400, "Missing required fields: file_content and filename")
 
         filename = body["filename"]
         file_content_b64 = body["file_content"]
 
-        allowed_extensions = [".pdf", ".txt", ".doc", ".docx"]
-        file_ext = "." + filename.split(".")[-1].lower()
+        error_response = validate_file_extension(filename)
+        if error_response:
+            return error_response
 
-        if file_ext not in allowed_extensions:
-            return create_error_response(
-                400,
-                f"File type not supported. Allowed: {', '.join(allowed_extensions)}",
-            )
+        # Reject oversized uploads from the base64 length before decoding anything
+        b64_len = len(file_content_b64)
+        decoded_size = (b64_len * 3) // 4 - file_content_b64[-2:].count("=")
+
+        if decoded_size > MAX_FILE_SIZE_BYTES:
+            return create_error_response(413, f"File too large. Maximum size: {MAX_FILE_SIZE_MB}MB")
 
         try:
             file_content = base64.b64decode(file_content_b64)
         except Exception as e:
-            logger.error(f"Failed to decode base64: {e}")
+            logger.error("Failed to decode base64: %s", e)
             return create_error_response(400, "Invalid base64 encoded file")
 
         file_size_mb = len(file_content) / (1024 * 1024)
-        max_size_mb = 10
 
-        if file_size_mb > max_size_mb:
-            return create_error_response(413, f"File too large. Maximum size: {max_size_mb}MB")
+        if len(file_content) > MAX_FILE_SIZE_BYTES:
+            return create_error_response(413, f"File too large. Maximum size: {MAX_FILE_SIZE_MB}MB")
 
-        logger.info(f"Uploading file: {filename} ({file_size_mb:.2f}MB)")
+        logger.info("Uploading file: %s (%.2fMB)", filename, file_size_mb)
 
         # Generate document ID and S3 key
-        import uuid
-
         document_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        s3_key = f"documents/{timestamp}_{document_id}_{filename}"
+        now = datetime.utcnow()
+        uploaded_at = now.isoformat()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        s3_key = build_object_key(document_id, filename, timestamp)
+
+        # A single-part PUT's ETag (SSE-S3) is the body's MD5, so it is known before the
+        # upload finishes; S3 rejects the PUT if the bytes don't match it
+        content_md5 = hashlib.md5(file_content, usedforsecurity=False).digest()
 
-        # Upload to S3
-        s3_client.put_object(
+        # Upload to S3 and save metadata to DynamoDB concurrently
+        s3_future = _executor.submit(
+            s3_client.put_object,
             Bucket=S3_BUCKET,
             Key=s3_key,
             Body=file_content,
             ContentType="application/octet-stream",
+            ContentMD5=base64.b64encode(content_md5).decode("ascii"),
         )
-        logger.info(f"Uploaded to S3: {s3_key}")
-
-        # Save metadata to DynamoDB
-        table = dynamodb_resource.Table(DYNAMODB_TABLE)
-        table.put_item(
+        # Low-level client: no TypeSerializer pass
+        dynamodb_future = _executor.submit(
+            dynamodb_client.put_item,
+            TableName=DYNAMODB_TABLE,
             Item={
-                "document_id": document_id,
-                "filename": filename,
-                "s3_key": s3_key,
-                "status": DocumentStatus.UPLOADED.value,
-                "uploaded_at": datetime.utcnow().isoformat(),
-                "file_size_bytes": len(file_content),
-            }
+                "document_id": {"S": document_id},
+                "filename": {"S": filename},
+                "s3_key": {"S": s3_key},
+                "status": {"S": DocumentStatus.UPLOADED.value},
+                "uploaded_at": {"S": uploaded_at},
+                "file_size_bytes": {"N": str(len(file_content))},
+                "s3_etag": {"S": content_md5.hex()},
+            },
         )
-        logger.info(f"Saved metadata to DynamoDB: {document_id}")
+
+        try:
+            s3_future.result()
+        except Exception:
+            # Don't leave metadata pointing at an object that was never written
+            if dynamodb_future.exception() is None:
+                dynamodb_client.delete_item(
+                    TableName=DYNAMODB_TABLE, Key={"document_id": {"S": document_id}}
+                )
+            raise
+        logger.info("Uploaded to S3: %s", s3_key)
+
+        dynamodb_future.result()
+        logger.info("Saved metadata to DynamoDB: %s", document_id)
 
         return create_response(
             200,
@@ -107,11 +378,11 @@ def handler(event, context):
                 "document_id": document_id,
                 "filename": filename,
                 "s3_key": s3_key,
-                "uploaded_at": datetime.utcnow().isoformat(),
+                "uploaded_at": uploaded_at,
                 "status": DocumentStatus.UPLOADED.value,
             },
         )
 
     except Exception as e:
-        logger.error(f"Upload failed: {e}", exc_info=True)
+        logger.error("Upload failed: %s", e, exc_info=True)
         return create_error_response(500, f"Upload failed: {str(e)}")
@@ -5,11 +5,46 @@ Shared utilities for Lambda handlers
 import json
 import logging
 import os
+from decimal import Decimal
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json when orjson is not packaged
+    orjson = None
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Shared by every response without custom headers (API Gateway does not mutate them)
+_DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization",
+    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
+}
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize DynamoDB numbers (Decimal) as int or float"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_json_default, separators=(",", ":"))
+
+
+def loads(data: Any) -> Any:
+    """Parse a JSON string or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 def create_response(
     status_code: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None
@@ -25,20 +60,10 @@ def create_response(
     Returns:
         API Gateway response format
     """
-    default_headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Headers": "Content-Type,Authorization",
-        "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
-    }
-
-    if headers:
-        default_headers.update(headers)
-
     return {
         "statusCode": status_code,
-        "headers": default_headers,
-        "body": json.dumps(body),
+        "headers": {**_DEFAULT_HEADERS, **headers} if headers else _DEFAULT_HEADERS,
+        "body": dumps(body),
     }
 
 
@@ -69,14 +94,17 @@ def parse_event_body(event: Dict[str, Any]) -> Dict[str, Any]:
         event: API Gateway event
 
     Returns:
-        Parsed body dictionary
+        Parsed body dictionary (empty for GET/preflight requests with no body)
     """
-    body = event.get("body", "{}")
+    body = event.get("body")
+
+    if not body:
+        return {}
 
-    if isinstance(body, str):
+    if isinstance(body, (str, bytes)):
         try:
-            return json.loads(body)
-        except json.JSONDecodeError:
+            return loads(body)
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses this
             logger.error(f"Failed to parse body: {body}")
             return {}
 
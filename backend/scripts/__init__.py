@@ -0,0 +1 @@
+"""One-off operational scripts for MedExtract (run from backend/ with python -m)"""
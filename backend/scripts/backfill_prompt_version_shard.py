@@ -0,0 +1,94 @@
+"""
+Backfill prompt_version_shard on results extracted before PromptVersionShardIndex
+
+Metrics read only PromptVersionShardIndex, which is keyed on prompt_version_shard.
+Results written before that attribute existed are missing from the index until
+this script sets it. Run it once per environment after the index is added
+(gsi_migration_step 1), from backend/:
+
+    python -m scripts.backfill_prompt_version_shard --table medextract-results-prod
+
+Only items with a prompt_version and no prompt_version_shard are selected, and
+each update is conditional on the attribute still being absent. Re-running the
+script is therefore safe and only updates what is left. To skip the part of the
+table an interrupted run already scanned, pass the last --start-key it logged.
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from app.services.metrics_service import prompt_version_shard
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(table, start_key: Optional[str] = None) -> int:
+    """
+    Set prompt_version_shard on every result that has a prompt_version but no shard
+
+    Args:
+        table: boto3 DynamoDB Table resource for the results table
+        start_key: document_id to resume the scan after (None: scan from the start)
+
+    Returns:
+        Number of items updated
+    """
+    scan_kwargs = {
+        "FilterExpression": (
+            Attr("prompt_version").exists() & Attr("prompt_version_shard").not_exists()
+        ),
+        "ProjectionExpression": "document_id, prompt_version",
+    }
+    if start_key:
+        scan_kwargs["ExclusiveStartKey"] = {"document_id": start_key}
+
+    updated = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get("Items", []):
+            try:
+                table.update_item(
+                    Key={"document_id": item["document_id"]},
+                    UpdateExpression="SET prompt_version_shard = :shard",
+                    ConditionExpression="attribute_not_exists(prompt_version_shard)",
+                    ExpressionAttributeValues={
+                        ":shard": prompt_version_shard(item["prompt_version"], item["document_id"])
+                    },
+                )
+                updated += 1
+            except ClientError as e:
+                # Re-extracted since the scan read it; extraction already set the shard
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return updated
+
+        logger.info(
+            f"Updated {updated} items so far (resume with --start-key {last_key['document_id']})"
+        )
+        scan_kwargs["ExclusiveStartKey"] = last_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--table", required=True, help="Results table name")
+    parser.add_argument("--start-key", help="document_id to resume the scan after")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    updated = backfill(table, start_key=args.start_key)
+    logger.info(f"Backfill complete: {updated} items updated")
+
+
+if __name__ == "__main__":
+    main()
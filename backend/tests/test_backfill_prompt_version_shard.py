@@ -0,0 +1,68 @@
+"""
+Unit tests for the prompt_version_shard backfill script
+"""
+
+from botocore.exceptions import ClientError
+
+from app.services.metrics_service import prompt_version_shard
+from scripts.backfill_prompt_version_shard import backfill
+
+
+class FakeTable:
+    """Results table stub returning canned scan pages"""
+
+    def __init__(self, pages, already_sharded=()):
+        self.pages = pages
+        self.already_sharded = set(already_sharded)
+        self.scans = []
+        self.updates = {}
+
+    def scan(self, **kwargs):
+        self.scans.append(kwargs.get("ExclusiveStartKey"))
+        return self.pages[len(self.scans) - 1]
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        if Key["document_id"] in self.already_sharded:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        self.updates[Key["document_id"]] = ExpressionAttributeValues[":shard"]
+
+
+class TestBackfill:
+    """Test suite for backfill()"""
+
+    def test_paginates_and_sets_shard(self):
+        """Test that every page is scanned and each item gets its shard key"""
+        table = FakeTable(
+            [
+                {
+                    "Items": [{"document_id": "doc-1", "prompt_version": "v1.0.0"}],
+                    "LastEvaluatedKey": {"document_id": "doc-1"},
+                },
+                {"Items": [{"document_id": "doc-2", "prompt_version": "v2.0.0"}]},
+            ]
+        )
+
+        assert backfill(table) == 2
+        assert table.scans == [None, {"document_id": "doc-1"}]
+        assert table.updates == {
+            "doc-1": prompt_version_shard("v1.0.0", "doc-1"),
+            "doc-2": prompt_version_shard("v2.0.0", "doc-2"),
+        }
+
+    def test_skips_items_sharded_since_the_scan(self):
+        """Test that items re-extracted during the backfill are left as they are"""
+        table = FakeTable(
+            [{"Items": [{"document_id": "doc-1", "prompt_version": "v1.0.0"}]}],
+            already_sharded={"doc-1"},
+        )
+
+        assert backfill(table) == 0
+        assert table.updates == {}
+
+    def test_resumes_after_start_key(self):
+        """Test that a resumed run starts the scan after the given document"""
+        table = FakeTable([{"Items": []}])
+
+        backfill(table, start_key="doc-9")
+
+        assert table.scans == [{"document_id": "doc-9"}]
@@ -0,0 +1,475 @@
+"""
+Unit tests for Lambda handler modules
+"""
+
+import importlib
+import inspect
+from pathlib import Path
+
+HANDLERS_DIR = Path(__file__).parent.parent / "lambda" / "handlers"
+
+
+def import_handler(name: str):
+    """Import a handler module by name ('lambda' is a keyword, so use importlib)"""
+    return importlib.import_module(f"lambda.handlers.{name}")
+
+
+class TestHandlerPackage:
+    """Test suite for the Lambda handler package layout"""
+
+    def test_one_module_per_handler(self):
+        """Test that each handler is defined by exactly one module"""
+        modules = sorted(p.stem for p in HANDLERS_DIR.glob("*.py") if p.stem != "__init__")
+
+        assert modules == ["experiment", "extract", "metrics", "prompts", "results", "router", "upload"]
+
+    def test_extract_handler_calls_bedrock(self):
+        """Test that the shipped extract handler is the real Bedrock implementation"""
+        extract = import_handler("extract")
+
+        assert "bedrock_runtime" in inspect.getsource(extract.extract_document)
+
+
+class TestBedrockBody:
+    """Test suite for the pre-serialized Bedrock request body"""
+
+    def test_matches_full_serialization(self):
+        """Test that splicing the prompt yields the same request as serializing it whole"""
+        import json
+
+        extract = import_handler("extract")
+        prompt = 'Patient "A"\nnotes: 5 mg \u00b5'
+
+        assert json.loads(extract.build_bedrock_body(prompt)) == {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+
+class TestPromptCache:
+    """Test suite for the extract handler's prompt template cache"""
+
+    def test_unknown_versions_share_the_fallback_entry(self, monkeypatch):
+        """Test that unknown prompt versions do not add cache entries"""
+        extract = import_handler("extract")
+        monkeypatch.setattr(extract, "_PROMPT_CACHE", {})
+
+        fallback = extract.get_prompt_parts("v2.0.0")
+        for version in ("v9.9.9", "bogus", "../v2.0.0"):
+            assert extract.get_prompt_parts(version) is fallback
+
+        assert list(extract._PROMPT_CACHE) == ["v2.0.0"]
+
+
+class TestExtractFunctionUrl:
+    """Test suite for extraction requests arriving via the function URL"""
+
+    def test_missing_document_id(self):
+        """Test that a function URL request without an ID in the path is rejected"""
+        extract = import_handler("extract")
+
+        response = extract.handler({"rawPath": "/", "body": "{}"}, None)
+
+        assert response["statusCode"] == 400
+
+
+class TestExtractQueue:
+    """Test suite for queued (SQS) extraction requests"""
+
+    @staticmethod
+    def _record(message_id, document_id, body):
+        return {
+            "messageId": message_id,
+            "body": body,
+            "messageAttributes": {"document_id": {"stringValue": document_id}},
+        }
+
+    def test_server_errors_are_reported_for_retry(self, monkeypatch):
+        """Test that 5xx and pending-upload outcomes are returned as batch item failures"""
+        extract = import_handler("extract")
+        calls = []
+
+        def fake_extract(document_id, prompt_version):
+            calls.append((document_id, prompt_version))
+            return {"statusCode": {"ok": 200, "missing": 404, "pending": 409, "broken": 500}[document_id]}
+
+        monkeypatch.setattr(extract, "extract_document", fake_extract)
+        event = {
+            "Records": [
+                self._record("1", "ok", '{"prompt_version": "v1.0.0"}'),
+                self._record("2", "missing", "{}"),
+                self._record("3", "pending", "{}"),
+                self._record("4", "broken", ""),
+            ]
+        }
+
+        assert extract.handler(event, None) == {
+            "batchItemFailures": [{"itemIdentifier": "3"}, {"itemIdentifier": "4"}]
+        }
+        assert calls == [("ok", "v1.0.0"), ("missing", "v2.0.0"), ("pending", "v2.0.0"), ("broken", "v2.0.0")]
+
+    def test_malformed_records_do_not_fail_the_batch(self, monkeypatch):
+        """Test that a malformed record is reported alone and the rest still run"""
+        extract = import_handler("extract")
+        calls = []
+
+        def fake_extract(document_id, prompt_version):
+            calls.append(document_id)
+            return {"statusCode": 200}
+
+        monkeypatch.setattr(extract, "extract_document", fake_extract)
+        event = {
+            "Records": [
+                {"messageId": "1", "body": "{}", "messageAttributes": {}},
+                self._record("2", "ok", "{}"),
+            ]
+        }
+
+        assert extract.handler(event, None) == {"batchItemFailures": [{"itemIdentifier": "1"}]}
+        assert calls == ["ok"]
+
+
+class TestDocumentCache:
+    """Test suite for the extract handler's local document cache"""
+
+    @staticmethod
+    def _fake_s3(monkeypatch, extract, tmp_path, body, etag="abc"):
+        import io
+
+        calls = []
+
+        class FakeS3:
+            def get_object(self, Bucket, Key):
+                calls.append(Key)
+                return {"Body": io.BytesIO(body), "ETag": f'"{etag}"'}
+
+        monkeypatch.setattr(extract, "DOCUMENT_CACHE_DIR", tmp_path / "documents")
+        monkeypatch.setattr(extract, "s3_client", FakeS3())
+        return calls
+
+    def test_repeat_reads_skip_s3(self, monkeypatch, tmp_path):
+        """Test that a document is fetched from S3 once per container"""
+        extract = import_handler("extract")
+        calls = self._fake_s3(monkeypatch, extract, tmp_path, b"patient notes")
+
+        assert extract.read_document("documents/a.txt", "abc") == "patient notes"
+        assert extract.read_document("documents/a.txt", "abc") == "patient notes"
+        assert calls == ["documents/a.txt"]
+
+    def test_rewritten_objects_are_not_served_stale(self, monkeypatch, tmp_path):
+        """Test that the cache is keyed by ETag and skipped when S3 returns another one"""
+        extract = import_handler("extract")
+        calls = self._fake_s3(monkeypatch, extract, tmp_path, b"new notes", etag="def")
+
+        assert extract.read_document("documents/a.txt", "abc") == "new notes"
+        assert extract.read_document("documents/a.txt", "abc") == "new notes"
+        assert extract.read_document("documents/a.txt") == "new notes"
+        assert len(calls) == 3
+
+    def test_evicts_least_recently_used(self, monkeypatch, tmp_path):
+        """Test that the cache stays within its byte budget"""
+        extract = import_handler("extract")
+        self._fake_s3(monkeypatch, extract, tmp_path, b"x" * 10)
+        monkeypatch.setattr(extract, "DOCUMENT_CACHE_MAX_BYTES", 25)
+
+        for key in ("a", "b", "c"):
+            extract.read_document(key, "abc")
+
+        cache_dir = tmp_path / "documents"
+        assert sum(p.stat().st_size for p in cache_dir.iterdir()) <= 25
+
+
+class TestObjectKeys:
+    """Test suite for document S3 key layout"""
+
+    def test_build_object_key(self):
+        """Test that keys are sharded by a stable hash of the document ID"""
+        upload = import_handler("upload")
+
+        key = upload.build_object_key("doc-1", "report.pdf", "20240101_120000")
+        prefix, shard, name = key.split("/")
+
+        assert prefix == "documents"
+        assert len(shard) == 4
+        assert name == "20240101_120000_doc-1_report.pdf"
+        assert upload.build_object_key("doc-1", "other.pdf", "20250101_000000").split("/")[1] == shard
+
+    def test_build_object_key_drops_directories(self):
+        """Test that a filename containing "/" can't add key segments"""
+        upload = import_handler("upload")
+
+        key = upload.build_object_key("doc-1", "scans/a.pdf", "20240101_120000")
+
+        assert key.split("/")[2] == "20240101_120000_doc-1_a.pdf"
+
+
+class TestPresignedUploads:
+    """Test suite for pre-signed upload confirmation"""
+
+    @staticmethod
+    def _s3_event(key, size):
+        s3_object = {"key": key, "size": size, "versionId": "v2", "eTag": "etag-1"}
+        return {"Records": [{"s3": {"object": s3_object}}]}
+
+    @staticmethod
+    def _fake_clients(monkeypatch, upload, status="pending_upload"):
+        calls = {"deleted": [], "updates": [], "documents": []}
+
+        class FakeS3:
+            def delete_object(self, **kwargs):
+                calls["deleted"].append((kwargs["Key"], kwargs.get("VersionId")))
+
+        class FakeDynamoDB:
+            def update_item(self, **kwargs):
+                if status != "pending_upload":
+                    raise upload.ClientError(
+                        {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+                    )
+                calls["updates"].append(kwargs["ExpressionAttributeValues"])
+                calls["documents"].append(kwargs["Key"]["document_id"]["S"])
+
+        monkeypatch.setattr(upload, "s3_client", FakeS3())
+        monkeypatch.setattr(upload, "dynamodb_client", FakeDynamoDB())
+        return calls
+
+    def test_confirms_upload_within_limit(self, monkeypatch):
+        """Test that an upload within the size limit is marked uploaded"""
+        upload = import_handler("upload")
+        calls = self._fake_clients(monkeypatch, upload)
+        key = upload.build_object_key("doc-1", "report.pdf", "20240101_120000")
+
+        assert upload.confirm_s3_uploads(self._s3_event(key, 1024)) == {"confirmed": 1, "rejected": 0}
+        assert calls["deleted"] == []
+        assert calls["updates"][0][":uploaded"] == {"S": "uploaded"}
+        assert calls["updates"][0][":etag"] == {"S": "etag-1"}
+
+    def test_base64_upload_records_etag(self, monkeypatch):
+        """Test that the base64 path records the body's MD5, the object's ETag"""
+        import base64
+        import hashlib
+        import json
+
+        upload = import_handler("upload")
+        calls = {}
+
+        class FakeS3:
+            def put_object(self, **kwargs):
+                calls["put"] = kwargs
+
+        class FakeDynamoDB:
+            def put_item(self, **kwargs):
+                calls["item"] = kwargs["Item"]
+
+        monkeypatch.setattr(upload, "s3_client", FakeS3())
+        monkeypatch.setattr(upload, "dynamodb_client", FakeDynamoDB())
+        body = {"filename": "notes.txt", "file_content": base64.b64encode(b"notes").decode()}
+
+        response = upload.handler({"body": json.dumps(body)}, None)
+
+        digest = hashlib.md5(b"notes").digest()
+        assert response["statusCode"] == 200
+        assert calls["put"]["ContentMD5"] == base64.b64encode(digest).decode()
+        assert calls["item"]["s3_etag"] == {"S": digest.hex()}
+
+    def test_confirms_keys_with_slash_in_filename(self, monkeypatch):
+        """Test that keys issued with an unsanitized filename still confirm"""
+        upload = import_handler("upload")
+        calls = self._fake_clients(monkeypatch, upload)
+
+        for key in (
+            "documents/ab12/20240101_120000_doc-1_scans/a.pdf",
+            "documents/20240101_120000_doc-2_report.pdf",  # Unsharded legacy key
+        ):
+            assert upload.confirm_s3_uploads(self._s3_event(key, 1024))["confirmed"] == 1
+
+        assert calls["documents"] == ["doc-1", "doc-2"]
+
+    def test_rejects_oversized_upload(self, monkeypatch):
+        """Test that an upload over the size limit is deleted and marked failed"""
+        upload = import_handler("upload")
+        calls = self._fake_clients(monkeypatch, upload)
+        key = upload.build_object_key("doc-1", "report.pdf", "20240101_120000")
+
+        result = upload.confirm_s3_uploads(self._s3_event(key, upload.MAX_FILE_SIZE_BYTES + 1))
+
+        assert result == {"confirmed": 0, "rejected": 1}
+        assert calls["deleted"] == [(key, "v2")]
+        assert calls["updates"][0][":failed"] == {"S": "failed"}
+
+    def test_oversized_re_upload_keeps_confirmed_document(self, monkeypatch):
+        """Test that an oversized re-PUT only removes its own version and keeps the status"""
+        upload = import_handler("upload")
+        calls = self._fake_clients(monkeypatch, upload, status="completed")
+        key = upload.build_object_key("doc-1", "report.pdf", "20240101_120000")
+
+        upload.confirm_s3_uploads(self._s3_event(key, upload.MAX_FILE_SIZE_BYTES + 1))
+
+        assert calls["deleted"] == [(key, "v2")]
+        assert calls["updates"] == []
+
+
+class TestResultsCache:
+    """Test suite for the results handler's read-through cache"""
+
+    @staticmethod
+    def _fake_client(monkeypatch, results, item):
+        calls = []
+
+        class FakeDynamoDB:
+            def get_item(self, TableName, Key):
+                calls.append(Key["document_id"]["S"])
+                attributes = {name: {"S": value} for name, value in item.items()}
+                return {"Item": {"document_id": Key["document_id"], **attributes}}
+
+        monkeypatch.setattr(results, "dynamodb_client", FakeDynamoDB())
+        monkeypatch.setattr(results, "_result_cache", type(results._result_cache)())
+        return calls
+
+    def test_completed_results_are_cached(self, monkeypatch):
+        """Test that repeat reads of a finished result skip DynamoDB"""
+        results = import_handler("results")
+        calls = self._fake_client(monkeypatch, results, {"status": "completed"})
+
+        assert results.get_result("doc-1")["status"] == "completed"
+        assert results.get_result("doc-1")["status"] == "completed"
+        assert calls == ["doc-1"]
+
+    def test_re_extracted_results_refresh_after_ttl(self, monkeypatch):
+        """Test that a re-extracted result is served from cache until the TTL expires"""
+        results = import_handler("results")
+        item = {"status": "completed", "extracted_at": "2024-01-01T00:00:00"}
+        self._fake_client(monkeypatch, results, item)
+        now = [1000.0]
+        monkeypatch.setattr(results.time, "monotonic", lambda: now[0])
+
+        results.get_result("doc-1")
+        item["extracted_at"] = "2024-01-02T00:00:00"
+        assert results.get_result("doc-1")["extracted_at"] == "2024-01-01T00:00:00"
+
+        now[0] += results.RESULT_CACHE_TTL_SECONDS
+        assert results.get_result("doc-1")["extracted_at"] == "2024-01-02T00:00:00"
+
+    def test_failed_results_are_not_cached(self, monkeypatch):
+        """Test that a failed document that is re-extracted is read fresh"""
+        results = import_handler("results")
+        item = {"status": "failed"}
+        calls = self._fake_client(monkeypatch, results, item)
+
+        assert results.get_result("doc-1")["status"] == "failed"
+        item.update(status="completed", extracted_at="2024-01-01T00:00:00")
+
+        assert results.get_result("doc-1")["status"] == "completed"
+        assert calls == ["doc-1", "doc-1"]
+
+    def test_in_progress_results_are_not_cached(self, monkeypatch):
+        """Test that polling a processing document always reads DynamoDB"""
+        results = import_handler("results")
+        calls = self._fake_client(monkeypatch, results, {"status": "processing"})
+
+        results.get_result("doc-1")
+        results.get_result("doc-1")
+
+        assert calls == ["doc-1", "doc-1"]
+
+
+class TestRouter:
+    """Test suite for the API router handler"""
+
+    def test_resolve_route(self):
+        """Test that API resources map to their route handlers"""
+        router = import_handler("router")
+
+        assert router.resolve_route("/api/upload") is import_handler("upload").handler
+        assert router.resolve_route("/api/metrics/prompts/{version}") is import_handler("metrics").handler
+        assert router.resolve_route("/api/lambda/metrics") is import_handler("metrics").handler
+        assert router.resolve_route("/api/experiments") is import_handler("experiment").handler
+        assert router.resolve_route("/api/results/{document_id}") is import_handler("results").handler
+        assert router.resolve_route("/api/unknown") is None
+        assert router.resolve_route("/") is None
+
+    def test_dispatch(self):
+        """Test that events are dispatched by resource and unknown routes 404"""
+        router = import_handler("router")
+
+        response = router.handler({"resource": "/api/prompts/versions", "httpMethod": "GET"}, None)
+        assert response is import_handler("prompts").get_versions_response()
+
+        assert router.handler({"resource": "/api/nope", "httpMethod": "GET"}, None)["statusCode"] == 404
+
+
+class TestParseEventBody:
+    """Test suite for utils.parse_event_body"""
+
+    def test_missing_or_empty_body(self):
+        """Test that GET-style events without a body parse to an empty dict"""
+        utils = importlib.import_module("lambda.utils")
+
+        assert utils.parse_event_body({}) == {}
+        assert utils.parse_event_body({"body": None}) == {}
+        assert utils.parse_event_body({"body": ""}) == {}
+
+    def test_json_body(self):
+        """Test that string and bytes JSON bodies are parsed"""
+        utils = importlib.import_module("lambda.utils")
+
+        assert utils.parse_event_body({"body": '{"a": 1}'}) == {"a": 1}
+        assert utils.parse_event_body({"body": b'{"a": 1}'}) == {"a": 1}
+
+    def test_invalid_json_body(self):
+        """Test that malformed JSON yields an empty dict"""
+        utils = importlib.import_module("lambda.utils")
+
+        assert utils.parse_event_body({"body": "{not json"}) == {}
+
+
+class TestPromptsHandler:
+    """Test suite for the prompts handler"""
+
+    def test_list_prompt_versions(self):
+        """Test that versions match the shipped prompt files, sorted"""
+        prompts = import_handler("prompts")
+        prompts_dir = Path(__file__).parent.parent / "prompts"
+        expected = sorted(p.stem for p in prompts_dir.glob("*.txt"))
+
+        assert prompts.list_prompt_versions() == expected
+
+    def test_get_versions_reuses_cached_response(self):
+        """Test that warm GETs return the same pre-serialized response"""
+        prompts = import_handler("prompts")
+        first = prompts.handler({"httpMethod": "GET"}, None)
+        second = prompts.handler({"httpMethod": "GET"}, None)
+
+        assert first["statusCode"] == 200
+        assert first is second
+        assert '"total_count"' in first["body"]
+
+
+class TestCreateResponse:
+    """Test suite for utils.create_response"""
+
+    def test_default_headers(self):
+        """Test that responses carry CORS headers and a compact JSON body"""
+        utils = importlib.import_module("lambda.utils")
+        response = utils.create_response(200, {"a": 1, "b": [1, 2]})
+
+        assert response["statusCode"] == 200
+        assert response["headers"]["Access-Control-Allow-Origin"] == "*"
+        assert response["body"] == '{"a":1,"b":[1,2]}'
+
+    def test_decimal_values(self):
+        """Test that DynamoDB Decimal numbers serialize as JSON numbers"""
+        from decimal import Decimal
+
+        utils = importlib.import_module("lambda.utils")
+
+        assert utils.dumps({"ms": Decimal("1500"), "score": Decimal("0.25")}) == '{"ms":1500,"score":0.25}'
+
+    def test_custom_headers_do_not_leak(self):
+        """Test that custom headers are merged without touching the shared defaults"""
+        utils = importlib.import_module("lambda.utils")
+        response = utils.create_response(200, {}, headers={"Cache-Control": "no-store"})
+
+        assert response["headers"]["Cache-Control"] == "no-store"
+        assert response["headers"]["Content-Type"] == "application/json"
+        assert "Cache-Control" not in utils.create_response(200, {})["headers"]
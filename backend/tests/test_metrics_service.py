@@ -2,17 +2,29 @@
 Unit tests for MetricsService
 """
 
+from datetime import datetime, timedelta
+
 import pytest
-from app.services.metrics_service import MetricsService
+from boto3.dynamodb.conditions import ConditionExpressionBuilder
+from app.services.metrics_service import (
+    MetricsService,
+    PROMPT_VERSION_SHARDS,
+    prompt_version_shard,
+)
+from app.services.prompt_manager import PromptManager
+
+
+@pytest.fixture(scope="module")
+def service():
+    """Shared MetricsService (boto3 resource setup runs once per module)"""
+    return MetricsService()
 
 
 class TestMetricsService:
     """Test suite for MetricsService"""
 
-    def test_calculate_cost(self):
+    def test_calculate_cost(self, service):
         """Test AWS Bedrock cost calculation"""
-        service = MetricsService()
-
         # Test with known values
         input_tokens = 1000
         output_tokens = 500
@@ -23,16 +35,22 @@ class TestMetricsService:
         # = 0.00025 + 0.000625 = 0.000875
         assert cost == pytest.approx(0.000875, abs=0.000001)
 
-    def test_calculate_cost_zero_tokens(self):
+    def test_calculate_cost_zero_tokens(self, service):
         """Test cost calculation with zero tokens"""
-        service = MetricsService()
         cost = service.calculate_cost(0, 0)
         assert cost == 0.0
 
-    def test_calculate_cost_large_numbers(self):
-        """Test cost calculation with large token counts"""
-        service = MetricsService()
+    def test_calculate_cost_by_model(self, service):
+        """Test that each model is costed at its own token prices"""
+        sonnet = service.calculate_cost(1000, 500, "anthropic.claude-3-sonnet-20240229-v1:0")
 
+        # (1000 * 0.003/1000) + (500 * 0.015/1000) = 0.003 + 0.0075
+        assert sonnet == 0.0105
+        # Unknown models fall back to the default (Haiku) pricing
+        assert service.calculate_cost(1000, 500, "unknown") == service.calculate_cost(1000, 500)
+
+    def test_calculate_cost_large_numbers(self, service):
+        """Test cost calculation with large token counts"""
         # 1M input tokens, 500K output tokens
         input_tokens = 1_000_000
         output_tokens = 500_000
@@ -43,18 +61,15 @@ class TestMetricsService:
         # = 0.25 + 0.625 = 0.875
         assert cost == pytest.approx(0.875, abs=0.001)
 
-    def test_calculate_field_completeness_empty(self):
+    def test_calculate_field_completeness_empty(self, service):
         """Test completeness calculation with empty data"""
-        service = MetricsService()
         completeness, count = service.calculate_field_completeness({})
 
         assert completeness == 0.0
         assert count == 0
 
-    def test_calculate_field_completeness_full(self):
+    def test_calculate_field_completeness_full(self, service):
         """Test completeness calculation with all fields"""
-        service = MetricsService()
-
         medical_data = {
             "patient_name": "John Doe",
             "date_of_birth": "1980-01-01",
@@ -72,10 +87,8 @@ class TestMetricsService:
         assert completeness == 100.0
         assert count == 9
 
-    def test_calculate_field_completeness_partial(self):
+    def test_calculate_field_completeness_partial(self, service):
         """Test completeness calculation with partial data"""
-        service = MetricsService()
-
         medical_data = {
             "patient_name": "John Doe",
             "date_of_birth": "1980-01-01",
@@ -91,10 +104,8 @@ class TestMetricsService:
         assert completeness == pytest.approx(33.33, abs=0.1)
         assert count == 3
 
-    def test_calculate_field_completeness_null_values(self):
+    def test_calculate_field_completeness_null_values(self, service):
         """Test that None/null values don't count"""
-        service = MetricsService()
-
         medical_data = {
             "patient_name": None,
             "date_of_birth": "",
@@ -107,18 +118,156 @@ class TestMetricsService:
         assert completeness == 0.0
         assert count == 0
 
+    def test_get_all_prompt_metrics(self, service, monkeypatch):
+        """Test that every shipped prompt version is queried over the same window"""
+        windows = {}
+
+        def fake_get_prompt_metrics(prompt_version, start_date, end_date):
+            windows[prompt_version] = end_date - start_date
+            return prompt_version if prompt_version != "v1.0.0" else None
+
+        monkeypatch.setattr(service, "get_prompt_metrics", fake_get_prompt_metrics)
+        shipped = sorted(p.stem for p in PromptManager.PROMPTS_DIR.glob("v*.txt"))
+
+        all_metrics = service.get_all_prompt_metrics(days=30)
+
+        assert sorted(windows) == shipped
+        assert set(windows.values()) == {timedelta(days=30)}
+        assert all_metrics == [version for version in shipped if version != "v1.0.0"]
+
+    def test_get_medical_data_retries_unprocessed_keys(self, service, monkeypatch):
+        """Test that unprocessed keys are retried with backoff up to the attempt limit"""
+        table_name = service.table.name
+        calls = []
+        sleeps = []
+
+        class FakeDynamoDB:
+            def batch_get_item(self, RequestItems):
+                calls.append(RequestItems)
+                item = {"document_id": "doc-1", "medical_data": {"patient_name": "A"}}
+                return {
+                    "Responses": {table_name: [item] if len(calls) == 1 else []},
+                    "UnprocessedKeys": {table_name: {"Keys": [{"document_id": "doc-2"}]}},
+                }
+
+        monkeypatch.setattr(service, "dynamodb", FakeDynamoDB())
+        monkeypatch.setattr("app.services.metrics_service.time.sleep", sleeps.append)
+
+        assert service._get_medical_data(["doc-1", "doc-2"]) == {"doc-1": {"patient_name": "A"}}
+        assert len(calls) == service.BATCH_GET_MAX_ATTEMPTS
+        assert sleeps == [0.05, 0.1, 0.2, 0.4]
+
 
 class TestMetricsServiceIntegration:
     """Integration tests requiring DynamoDB (mocked)"""
 
-    @pytest.mark.skip(reason="Requires DynamoDB mock setup")
-    def test_get_prompt_metrics(self):
-        """Test retrieving metrics for a prompt version"""
-        # Would test with mocked DynamoDB
-        pass
+    def test_get_prompt_metrics(self, service, monkeypatch):
+        """Test the sharded, range-bounded index query merged with base table data"""
+        table_name = service.table.name
+        start, end = datetime(2024, 1, 1), datetime(2024, 1, 8)
+        haiku = "anthropic.claude-3-haiku-20240307-v1:0"
+        sonnet = "anthropic.claude-3-sonnet-20240229-v1:0"
+        tokens = {"input_tokens": 1000, "output_tokens": 500}
+
+        def result(document_id, status, **attributes):
+            return {
+                "document_id": document_id,
+                "status": status,
+                "extracted_at": "2024-01-02T00:00:00",
+                **attributes,
+            }
+
+        completed = {"status": "completed", "token_usage": tokens}
+        # Shard 0 spans two pages; shard 5 holds a failure; the other shards are empty
+        pages = {
+            ("v2.0.0#0", None): {
+                "Items": [result("doc-1", **completed, processing_time_ms=100, model_id=haiku)],
+                "LastEvaluatedKey": {"document_id": "doc-1"},
+            },
+            ("v2.0.0#0", "doc-1"): {
+                "Items": [result("doc-2", **completed, processing_time_ms=300, model_id=sonnet)],
+            },
+            ("v2.0.0#5", None): {"Items": [result("doc-3", "failed")]},
+        }
+        queries = []
+
+        class FakeClient:
+            def query(self, **kwargs):
+                built = ConditionExpressionBuilder().build_expression(
+                    kwargs["KeyConditionExpression"], is_key_condition=True
+                )
+                shard_key, *bounds = built.attribute_value_placeholders.values()
+                start_key = kwargs.get("ExclusiveStartKey", {}).get("document_id")
+                queries.append((kwargs["IndexName"], shard_key, start_key, bounds))
+                return pages.get((shard_key, start_key), {"Items": []})
+
+        class FakeTable:
+            name = table_name
+            meta = type("Meta", (), {"client": FakeClient()})()
+
+        doc_2_data = {"patient_name": "B", "date_of_birth": "1970-01-01"}
+
+        class FakeDynamoDB:
+            def batch_get_item(self, RequestItems):
+                requested = [key["document_id"] for key in RequestItems[table_name]["Keys"]]
+                assert sorted(requested) == ["doc-1", "doc-2"]
+                return {
+                    "Responses": {
+                        table_name: [
+                            {"document_id": "doc-1", "medical_data": {"patient_name": "A"}},
+                            {"document_id": "doc-2", "medical_data": doc_2_data},
+                        ]
+                    }
+                }
+
+        monkeypatch.setattr(service, "table", FakeTable())
+        monkeypatch.setattr(service, "dynamodb", FakeDynamoDB())
+
+        metrics = service.get_prompt_metrics("v2.0.0", start_date=start, end_date=end)
+
+        # Every shard queried on the sharded index, following pagination, within the window
+        assert {query[1] for query in queries} == {
+            f"v2.0.0#{shard:x}" for shard in range(PROMPT_VERSION_SHARDS)
+        }
+        assert len(queries) == PROMPT_VERSION_SHARDS + 1
+        assert {query[0] for query in queries} == {service.PROMPT_VERSION_INDEX}
+        assert all(query[3] == [start.isoformat(), end.isoformat()] for query in queries)
+
+        assert (metrics.total_requests, metrics.successful_requests, metrics.failed_requests) == (
+            3,
+            2,
+            1,
+        )
+        assert metrics.avg_processing_time_ms == 200
+        # Each result costed at its own model's prices
+        expected_cost = service.calculate_cost(1000, 500, haiku) + service.calculate_cost(
+            1000, 500, sonnet
+        )
+        assert metrics.total_cost_usd == round(expected_cost, 4)
+        assert metrics.avg_cost_per_request == pytest.approx(expected_cost / 2, abs=1e-6)
+        # Completeness from base table medical_data: 1 and 2 of 9 fields
+        assert metrics.avg_fields_extracted == 1.5
+        assert metrics.avg_field_completeness == pytest.approx(16.665, abs=0.01)
 
     @pytest.mark.skip(reason="Requires DynamoDB mock setup")
     def test_compare_prompts(self):
         """Test statistical comparison of prompts"""
         # Would test with mocked DynamoDB
         pass
+
+
+class TestPromptVersionShard:
+    """Test suite for PromptVersionShardIndex key sharding"""
+
+    def test_shard_key_is_stable(self):
+        """Test that a document always maps to the same shard of its prompt version"""
+        key = prompt_version_shard("v2.0.0", "doc-1")
+
+        assert key == prompt_version_shard("v2.0.0", "doc-1")
+        assert key.startswith("v2.0.0#")
+
+    def test_shards_cover_range(self):
+        """Test that documents spread over all shards"""
+        shards = {prompt_version_shard("v1.0.0", f"doc-{i}") for i in range(1000)}
+
+        assert shards == {f"v1.0.0#{shard:x}" for shard in range(PROMPT_VERSION_SHARDS)}
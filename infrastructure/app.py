@@ -6,6 +6,7 @@ Defines the infrastructure stack for MedExtract MLOps platform.
 Supports multiple environments (dev, staging, prod) with appropriate configurations.
 """
 
+import importlib
 import os
 from aws_cdk import App, Environment, Tags
 
@@ -20,42 +21,8 @@ env_name = app.node.try_get_context("env") or "dev"
 account = os.environ.get("CDK_DEFAULT_ACCOUNT")
 region = os.environ.get("CDK_DEFAULT_REGION", "us-east-1")
 
-# Environment-specific configurations
-env_config = {
-    "dev": {
-        "dynamodb_billing_mode": "PAY_PER_REQUEST",
-        "s3_lifecycle_days": 30,
-        "enable_deletion_protection": False,
-        "lambda_memory": 512,  # MB for extract function
-        "lambda_reserved_concurrency": None,  # No limit in dev
-        "api_throttle_rate": 100,
-        "api_throttle_burst": 200,
-        "monitoring_alarms": False,
-    },
-    "staging": {
-        "dynamodb_billing_mode": "PAY_PER_REQUEST",
-        "s3_lifecycle_days": 90,
-        "enable_deletion_protection": True,
-        "lambda_memory": 1024,
-        "lambda_reserved_concurrency": 50,  # Cost control
-        "api_throttle_rate": 500,
-        "api_throttle_burst": 1000,
-        "monitoring_alarms": True,
-    },
-    "prod": {
-        "dynamodb_billing_mode": "PROVISIONED",
-        "dynamodb_read_capacity": 10,
-        "dynamodb_write_capacity": 5,
-        "s3_lifecycle_days": 365,
-        "enable_deletion_protection": True,
-        "lambda_memory": 2048,  # High memory for production ML
-        "lambda_reserved_concurrency": 100,  # Reserve capacity
-        "api_throttle_rate": 1000,
-        "api_throttle_burst": 2000,
-        "monitoring_alarms": True,
-        "backup_enabled": True,
-    },
-}
+# Environment-specific configuration (only the selected environment's module is loaded)
+config = importlib.import_module(f"configs.{env_name}").CONFIG
 
 # Create the stack
 stack = MedExtractStack(
@@ -63,7 +30,7 @@ stack = MedExtractStack(
     f"MedExtractStack-{env_name}",
     env=Environment(account=account, region=region),
     env_name=env_name,
-    config=env_config[env_name],
+    config=config,
     description=f"MedExtract MLOps Platform - {env_name.upper()} environment",
 )
 
@@ -0,0 +1 @@
+"""Environment-specific stack configurations (one module per environment)"""
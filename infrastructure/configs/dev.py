@@ -0,0 +1,14 @@
+"""Development environment configuration"""
+
+CONFIG = {
+    "dynamodb_billing_mode": "PAY_PER_REQUEST",
+    "s3_lifecycle_days": 30,
+    "enable_deletion_protection": False,
+    "enable_pitr": False,
+    "gsi_migration_step": 1,  # Reshaped GSIs roll out one step per deploy (see README)
+    "extract_memory": 512,  # MB; power-tuned per function (see README)
+    "lambda_reserved_concurrency": None,  # No limit in dev
+    "api_throttle_rate": 100,
+    "api_throttle_burst": 200,
+    "monitoring_alarms": False,
+}
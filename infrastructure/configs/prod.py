@@ -0,0 +1,24 @@
+"""Production environment configuration"""
+
+CONFIG = {
+    "dynamodb_billing_mode": "PROVISIONED",
+    "dynamodb_provisioned_tables": ["results"],  # Others (experiments) stay on-demand
+    "dynamodb_read_capacity": 10,
+    "dynamodb_write_capacity": 5,
+    "gsi_capacity": {
+        "UploadedAtKeysIndex": {"read": 2, "write": 5},  # Written with every item, rarely listed
+        "PromptVersionShardIndex": {"read": 10, "write": 5},  # Metrics fan out over 16 shards
+    },
+    "s3_lifecycle_days": 365,
+    "enable_deletion_protection": True,
+    "enable_pitr": True,  # Point-in-time recovery on both tables
+    "gsi_migration_step": 1,  # Reshaped GSIs roll out one step per deploy (see README)
+    "extract_memory": 1024,  # Bedrock round-trip dominates; 2048 bought no latency
+    "lambda_reserved_concurrency": 100,  # Reserve capacity
+    "extract_provisioned_concurrency": 3,  # Warm instances for the synchronous extract route
+    "api_provisioned_concurrency": 1,
+    "api_throttle_rate": 1000,
+    "api_throttle_burst": 2000,
+    "monitoring_alarms": True,
+    "backup_enabled": True,
+}
@@ -0,0 +1,15 @@
+"""Staging environment configuration"""
+
+CONFIG = {
+    "dynamodb_billing_mode": "PAY_PER_REQUEST",
+    "s3_lifecycle_days": 90,
+    "enable_deletion_protection": True,
+    "enable_pitr": True,  # Point-in-time recovery on both tables
+    "gsi_migration_step": 1,  # Reshaped GSIs roll out one step per deploy (see README)
+    "extract_memory": 1024,
+    "lambda_reserved_concurrency": 50,  # Cost control
+    "extract_provisioned_concurrency": 1,  # Keep one extract instance warm
+    "api_throttle_rate": 500,
+    "api_throttle_burst": 1000,
+    "monitoring_alarms": True,
+}
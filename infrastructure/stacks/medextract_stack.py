@@ -2,28 +2,56 @@
 MedExtract CDK Stack
 
 Production infrastructure for medical document intelligence platform.
-Includes: S3, DynamoDB, Lambda, IAM, CloudWatch, API Gateway
+Includes: S3, DynamoDB, Lambda, SQS, IAM, CloudWatch, API Gateway
 """
 
 from aws_cdk import (
     Stack,
     RemovalPolicy,
     Duration,
+    Size,
     CfnOutput,
     BundlingOptions,
     aws_s3 as s3,
+    aws_s3_notifications as s3n,
     aws_dynamodb as dynamodb,
     aws_iam as iam,
     aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_events,
     aws_apigateway as apigw,
     aws_logs as logs,
     aws_cloudwatch as cloudwatch,
     aws_cloudwatch_actions as cw_actions,
     aws_sns as sns,
+    aws_sqs as sqs,
 )
 from constructs import Construct
 from typing import Dict, Any
 
+# Bedrock foundation model invoked by the extract function (IAM is scoped to it)
+BEDROCK_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+
+# Results table GSIs at each gsi_migration_step. CloudFormation can't change an
+# index's keys or projection in place and adds or drops at most one GSI per table
+# update, so reshaped indexes get new names and roll out one step per deploy
+# (see README). Step 0 is the original ALL-projection layout.
+RESULTS_GSI_STEPS = (
+    ("UploadedAtIndex", "PromptVersionIndex"),
+    ("UploadedAtIndex", "PromptVersionIndex", "PromptVersionShardIndex"),
+    ("UploadedAtIndex", "PromptVersionShardIndex"),
+    ("UploadedAtIndex", "PromptVersionShardIndex", "UploadedAtKeysIndex"),
+    ("PromptVersionShardIndex", "UploadedAtKeysIndex"),
+)
+
+# Experiments table GSIs at the same steps (StatusIndex is replaced by a keys-only index)
+EXPERIMENTS_GSI_STEPS = (
+    ("StatusIndex",),
+    ("StatusIndex", "StatusKeysIndex"),
+    ("StatusKeysIndex",),
+    ("StatusKeysIndex",),
+    ("StatusKeysIndex",),
+)
+
 
 class MedExtractStack(Stack):
     """
@@ -33,6 +61,7 @@ class MedExtractStack(Stack):
     - S3: Document storage with lifecycle policies
     - DynamoDB: Results and experiments storage
     - Lambda: API backend
+    - SQS: Asynchronous extraction queue
     - IAM: Least-privilege roles
     - CloudWatch: Monitoring and alarms
     - SNS: Alerting
@@ -59,6 +88,8 @@ class MedExtractStack(Stack):
         
         # Lambda functions for serverless API
         self.lambda_functions = self._create_lambda_functions()
+        self.lambda_aliases = self._create_lambda_aliases()
+        self.extract_queue = self._create_extract_queue()
         self.api_gateway = self._create_api_gateway()
         
         if config.get("monitoring_alarms"):
@@ -70,6 +101,33 @@ class MedExtractStack(Stack):
 
     def _create_s3_bucket(self) -> s3.Bucket:
         """Create S3 bucket for document storage"""
+        expiration_days = self.config["s3_lifecycle_days"]
+
+        # Standard -> IA -> Glacier IR -> Deep Archive; only steps that happen before expiration
+        transitions = [
+            s3.Transition(storage_class=storage_class, transition_after=Duration.days(days))
+            for storage_class, days in (
+                (s3.StorageClass.INFREQUENT_ACCESS, 30),
+                (s3.StorageClass.GLACIER_INSTANT_RETRIEVAL, 90),
+                (s3.StorageClass.DEEP_ARCHIVE, 180),
+            )
+            if days < expiration_days
+        ]
+
+        lifecycle_rules = [
+            s3.LifecycleRule(
+                id="DeleteOldDocuments",
+                enabled=True,
+                expiration=Duration.days(expiration_days),
+                noncurrent_version_expiration=Duration.days(7),
+                abort_incomplete_multipart_upload_after=Duration.days(7),
+            ),
+        ]
+        if transitions:
+            lifecycle_rules.append(
+                s3.LifecycleRule(id="TransitionToIA", enabled=True, transitions=transitions)
+            )
+
         bucket = s3.Bucket(
             self,
             "DocumentBucket",
@@ -77,34 +135,28 @@ class MedExtractStack(Stack):
             versioned=True,
             encryption=s3.BucketEncryption.S3_MANAGED,
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
-            lifecycle_rules=[
-                s3.LifecycleRule(
-                    id="DeleteOldDocuments",
-                    enabled=True,
-                    expiration=Duration.days(self.config["s3_lifecycle_days"]),
-                    noncurrent_version_expiration=Duration.days(7),
-                ),
-                s3.LifecycleRule(
-                    id="TransitionToIA",
-                    enabled=True,
-                    transitions=[
-                        s3.Transition(
-                            storage_class=s3.StorageClass.INFREQUENT_ACCESS,
-                            transition_after=Duration.days(30),
-                        )
-                    ],
-                ),
-            ],
+            lifecycle_rules=lifecycle_rules,
+            # Objects under 128KB stay in Standard: IA bills them as 128KB and each
+            # transition is a per-object charge that small text documents never earn back
+            transition_default_minimum_object_size=s3.TransitionDefaultMinimumObjectSize.ALL_STORAGE_CLASSES_128_K,
+            transfer_acceleration=True,  # Pre-signed uploads enter AWS at the nearest edge location
             removal_policy=RemovalPolicy.RETAIN if self.config["enable_deletion_protection"] else RemovalPolicy.DESTROY,
             auto_delete_objects=not self.config["enable_deletion_protection"],
         )
 
         # Add CORS for frontend uploads
         bucket.add_cors_rule(
-            allowed_methods=[s3.HttpMethods.GET, s3.HttpMethods.PUT, s3.HttpMethods.POST],
+            allowed_methods=[s3.HttpMethods.GET, s3.HttpMethods.PUT],  # Pre-signed PUT uploads, no POST forms
             allowed_origins=["http://localhost:3000", "http://localhost:5173"],
-            allowed_headers=["*"],
-            max_age=3000,
+            # Explicit headers (a "*" allowlist is not honoured for preflight caching by every browser)
+            allowed_headers=[
+                "Content-Type",
+                "Authorization",
+                "x-amz-content-sha256",
+                "x-amz-date",
+                "x-amz-security-token",
+            ],
+            max_age=86400,  # Cache preflight for a day
         )
 
         return bucket
@@ -112,12 +164,11 @@ class MedExtractStack(Stack):
     def _create_results_table(self) -> dynamodb.Table:
         """Create DynamoDB table for extraction results"""
         
-        if self.config["dynamodb_billing_mode"] == "PROVISIONED":
-            billing_mode = dynamodb.BillingMode.PROVISIONED
+        billing_mode = self._choose_billing_mode("results")
+        if billing_mode == dynamodb.BillingMode.PROVISIONED:
             read_capacity = self.config.get("dynamodb_read_capacity", 5)
             write_capacity = self.config.get("dynamodb_write_capacity", 5)
         else:
-            billing_mode = dynamodb.BillingMode.PAY_PER_REQUEST
             read_capacity = None
             write_capacity = None
 
@@ -131,39 +182,106 @@ class MedExtractStack(Stack):
             billing_mode=billing_mode,
             read_capacity=read_capacity,
             write_capacity=write_capacity,
-            point_in_time_recovery=self.config.get("enable_deletion_protection", False),
+            point_in_time_recovery=self.config.get("enable_pitr", False),
             removal_policy=RemovalPolicy.RETAIN if self.config["enable_deletion_protection"] else RemovalPolicy.DESTROY,
-            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,  # For analytics
+            stream=dynamodb.StreamViewType.NEW_IMAGE,  # For analytics (consumers only need the current item)
+            # Most-accessed and most-throttled keys, to spot hot partitions before they throttle
+            contributor_insights_enabled=self.config.get("monitoring_alarms", False),
         )
 
-        # Global Secondary Index for querying by upload time
-        table.add_global_secondary_index(
-            index_name="UploadedAtIndex",
-            partition_key=dynamodb.Attribute(
-                name="uploaded_at", type=dynamodb.AttributeType.STRING
-            ),
-            projection_type=dynamodb.ProjectionType.ALL,
-        )
+        index_props = {
+            # Original indexes, kept until their replacements are live (ALL projection)
+            "UploadedAtIndex": {
+                "partition_key": dynamodb.Attribute(
+                    name="uploaded_at", type=dynamodb.AttributeType.STRING
+                ),
+                "projection_type": dynamodb.ProjectionType.ALL,
+            },
+            "PromptVersionIndex": {
+                "partition_key": dynamodb.Attribute(
+                    name="prompt_version", type=dynamodb.AttributeType.STRING
+                ),
+                "projection_type": dynamodb.ProjectionType.ALL,
+            },
+            # Querying by upload time. Keys only: callers list document IDs and
+            # fetch full items from the base table
+            "UploadedAtKeysIndex": {
+                "partition_key": dynamodb.Attribute(
+                    name="uploaded_at", type=dynamodb.AttributeType.STRING
+                ),
+                "projection_type": dynamodb.ProjectionType.KEYS_ONLY,
+            },
+            # Querying by prompt version (MLOps), range-bounded by extraction time.
+            # Keyed by "{prompt_version}#{shard}" (16 shards, see
+            # metrics_service.prompt_version_shard) so one busy prompt version doesn't
+            # concentrate on a single partition. Projects only the attributes metrics
+            # aggregate (medical_data stays in the base table)
+            "PromptVersionShardIndex": {
+                "partition_key": dynamodb.Attribute(
+                    name="prompt_version_shard", type=dynamodb.AttributeType.STRING
+                ),
+                "sort_key": dynamodb.Attribute(
+                    name="extracted_at", type=dynamodb.AttributeType.STRING
+                ),
+                "projection_type": dynamodb.ProjectionType.INCLUDE,
+                "non_key_attributes": [
+                    "status",
+                    "processing_time_ms",
+                    "token_usage",
+                    "model_id",
+                ],
+            },
+        }
 
-        # GSI for querying by prompt version (MLOps)
-        table.add_global_secondary_index(
-            index_name="PromptVersionIndex",
-            partition_key=dynamodb.Attribute(
-                name="prompt_version", type=dynamodb.AttributeType.STRING
-            ),
-            projection_type=dynamodb.ProjectionType.ALL,
-        )
+        # New stacks start at the final step; existing ones step through one deploy at a time
+        step = self.config.get("gsi_migration_step", len(RESULTS_GSI_STEPS) - 1)
+        self.results_indexes = RESULTS_GSI_STEPS[step]
+        for index_name in self.results_indexes:
+            table.add_global_secondary_index(
+                index_name=index_name,
+                **index_props[index_name],
+                **self._gsi_capacity(index_name),
+            )
+
+        if self.config.get("monitoring_alarms"):
+            # The L2 Table only enables Contributor Insights on the base table; GSIs render
+            # in the order they were added above
+            cfn_table = table.node.default_child
+            for position in range(len(self.results_indexes)):
+                cfn_table.add_property_override(
+                    f"GlobalSecondaryIndexes.{position}.ContributorInsightsSpecification.Enabled", True
+                )
 
         return table
 
+    def _choose_billing_mode(self, table_kind: str) -> dynamodb.BillingMode:
+        """Billing mode for a table ("results" or "experiments")
+
+        PROVISIONED applies only to tables in dynamodb_provisioned_tables (default:
+        the steady results hot path). Bursty, low-volume tables such as A/B
+        experiments stay on-demand, which absorbs spikes without capacity tuning.
+        """
+        provisioned_tables = self.config.get("dynamodb_provisioned_tables", ["results"])
+        if self.config["dynamodb_billing_mode"] == "PROVISIONED" and table_kind in provisioned_tables:
+            return dynamodb.BillingMode.PROVISIONED
+        return dynamodb.BillingMode.PAY_PER_REQUEST
+
+    def _gsi_capacity(self, index_name: str) -> Dict[str, int]:
+        """Provisioned capacity for a results table GSI, sized per index (empty when on-demand)
+
+        A throttled GSI write also fails the base table write, so each index gets
+        its own config entry instead of sharing one default.
+        """
+        if self._choose_billing_mode("results") != dynamodb.BillingMode.PROVISIONED:
+            return {}
+        capacity = self.config.get("gsi_capacity", {}).get(index_name, {})
+        return {
+            "read_capacity": capacity.get("read", 5),
+            "write_capacity": capacity.get("write", 5),
+        }
+
     def _create_experiments_table(self) -> dynamodb.Table:
         """Create DynamoDB table for A/B experiments"""
-        
-        billing_mode = (
-            dynamodb.BillingMode.PROVISIONED
-            if self.config["dynamodb_billing_mode"] == "PROVISIONED"
-            else dynamodb.BillingMode.PAY_PER_REQUEST
-        )
 
         table = dynamodb.Table(
             self,
@@ -172,19 +290,27 @@ class MedExtractStack(Stack):
             partition_key=dynamodb.Attribute(
                 name="experiment_id", type=dynamodb.AttributeType.STRING
             ),
-            billing_mode=billing_mode,
-            point_in_time_recovery=self.config.get("enable_deletion_protection", False),
+            billing_mode=self._choose_billing_mode("experiments"),
+            point_in_time_recovery=self.config.get("enable_pitr", False),
             removal_policy=RemovalPolicy.RETAIN if self.config["enable_deletion_protection"] else RemovalPolicy.DESTROY,
         )
 
-        # GSI for querying by status
-        table.add_global_secondary_index(
-            index_name="StatusIndex",
-            partition_key=dynamodb.Attribute(
-                name="status", type=dynamodb.AttributeType.STRING
-            ),
-            projection_type=dynamodb.ProjectionType.ALL,
-        )
+        # GSI for querying by status. StatusIndex is the original (ALL projection);
+        # StatusKeysIndex is keys only: experiments are small, callers fetch full
+        # items from the base table
+        projections = {
+            "StatusIndex": dynamodb.ProjectionType.ALL,
+            "StatusKeysIndex": dynamodb.ProjectionType.KEYS_ONLY,
+        }
+        step = self.config.get("gsi_migration_step", len(EXPERIMENTS_GSI_STEPS) - 1)
+        for index_name in EXPERIMENTS_GSI_STEPS[step]:
+            table.add_global_secondary_index(
+                index_name=index_name,
+                partition_key=dynamodb.Attribute(
+                    name="status", type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=projections[index_name],
+            )
 
         return table
 
@@ -197,6 +323,7 @@ class MedExtractStack(Stack):
             assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
             description="Execution role for MedExtract Lambda functions",
             managed_policies=[
+                # CloudWatch Logs (log groups themselves are created by the stack)
                 iam.ManagedPolicy.from_aws_managed_policy_name(
                     "service-role/AWSLambdaBasicExecutionRole"
                 ),
@@ -206,51 +333,34 @@ class MedExtractStack(Stack):
         # S3 permissions (scoped to our bucket)
         self.document_bucket.grant_read_write(role)
 
-        # DynamoDB permissions
+        # DynamoDB permissions (read/write data includes Query and Scan for metrics)
         self.results_table.grant_read_write_data(role)
         self.experiments_table.grant_read_write_data(role)
-        
-        # Add Scan permission explicitly for metrics queries
-        role.add_to_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=["dynamodb:Scan"],
-                resources=[
-                    self.results_table.table_arn,
-                    self.experiments_table.table_arn,
-                ],
-            )
-        )
 
-        # Bedrock permissions (specific to Claude models)
+        # Bedrock permissions (only the model the extract function invokes; no streaming)
         role.add_to_policy(
             iam.PolicyStatement(
                 effect=iam.Effect.ALLOW,
-                actions=[
-                    "bedrock:InvokeModel",
-                    "bedrock:InvokeModelWithResponseStream",
-                ],
+                actions=["bedrock:InvokeModel"],
                 resources=[
-                    f"arn:aws:bedrock:{self.region}::foundation-model/anthropic.claude-*",
-                ],
-            )
-        )
-
-        # CloudWatch Logs (explicit for custom log groups)
-        role.add_to_policy(
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=[
-                    "logs:CreateLogGroup",
-                    "logs:CreateLogStream",
-                    "logs:PutLogEvents",
+                    f"arn:aws:bedrock:{self.region}::foundation-model/{BEDROCK_MODEL_ID}",
                 ],
-                resources=[f"arn:aws:logs:{self.region}:{self.account}:log-group:/aws/lambda/medextract-*"],
             )
         )
 
         return role
 
+    def _create_log_group(self, name: str) -> logs.LogGroup:
+        """Create a function's log group (Infrequent Access: cheaper ingest, Logs Insights still works)"""
+        return logs.LogGroup(
+            self,
+            f"{name.capitalize()}LogGroup",
+            log_group_name=f"/aws/lambda/medextract-{name}-{self.env_name}",
+            retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
+            log_group_class=logs.LogGroupClass.INFREQUENT_ACCESS,
+            removal_policy=RemovalPolicy.RETAIN if self.config["enable_deletion_protection"] else RemovalPolicy.DESTROY,
+        )
+
     def _create_lambda_functions(self) -> Dict[str, lambda_.Function]:
         """Create Lambda functions for API backend"""
         functions = {}
@@ -261,106 +371,157 @@ class MedExtractStack(Stack):
             "EXPERIMENTS_TABLE": self.experiments_table.table_name,
             "S3_BUCKET": self.document_bucket.bucket_name,
             "ENVIRONMENT": self.env_name,
+            "BEDROCK_MODEL_ID": BEDROCK_MODEL_ID,
+            "S3_ACCELERATE": "true",
         }
         
         # Common bundling configuration for all Lambda functions
-        # Bundles Python dependencies using Docker
+        # Bundles Python dependencies using Docker, resolving aarch64 wheels for Graviton
         bundling_config = BundlingOptions(
-            image=lambda_.Runtime.PYTHON_3_11.bundling_image,
+            image=lambda_.Runtime.PYTHON_3_13.bundling_image,
             command=[
                 "bash", "-c",
-                "pip install -r requirements.txt -t /asset-output && cp -r . /asset-output"
+                "pip install -r requirements.txt -t /asset-output"
+                " --platform manylinux2014_aarch64 --implementation cp --python-version 3.13"
+                " --only-binary=:all: && cp -r . /asset-output"
             ],
         )
-        
-        # 1. Upload Handler - Process document uploads
-        functions["upload"] = lambda_.Function(
-            self,
-            "UploadFunction",
-            function_name=f"medextract-upload-{self.env_name}",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="lambda.handlers.upload.handler",
-            code=lambda_.Code.from_asset("../backend", bundling=bundling_config),
-            role=self.lambda_role,
-            environment=common_env,
-            memory_size=512,  # Low memory for simple S3 operations
-            timeout=Duration.seconds(60),
-            tracing=lambda_.Tracing.ACTIVE,  # X-Ray tracing
-            log_retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
+
+        # Keep tests, scripts, docs and local build artifacts out of the deployment package
+        asset_exclude = [
+            "tests",
+            "scripts",
+            "docs",
+            "htmlcov",
+            "lambda_package",
+            ".env*",
+            "*.ps1",
+            "*.md",
+            "**/__pycache__",
+            ".pytest_cache",
+            ".coverage",
+        ]
+
+        # Bundle once and share the asset so pip runs and the zip uploads a single time
+        shared_code = lambda_.Code.from_asset(
+            "../backend", bundling=bundling_config, exclude=asset_exclude
         )
         
-        # 2. Extract Handler - Call Bedrock for data extraction
-        functions["extract"] = lambda_.Function(
-            self,
-            "ExtractFunction",
-            function_name=f"medextract-extract-{self.env_name}",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="lambda.handlers.extract.handler",
-            code=lambda_.Code.from_asset("../backend", bundling=bundling_config),
-            role=self.lambda_role,
-            environment=common_env,
-            memory_size=self.config["lambda_memory"],  # Higher memory for ML inference
-            timeout=Duration.seconds(300),  # 5 min for Bedrock calls
-            tracing=lambda_.Tracing.ACTIVE,
-            log_retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
-            reserved_concurrent_executions=self.config.get("lambda_reserved_concurrency"),  # Cost control
+        # (name, handler, memory MB, timeout s, reserved concurrency)
+        specs = [
+            # Routes upload, results, metrics, prompts and experiment requests; sized for metrics aggregations
+            ("api", "lambda.handlers.router.handler", self.config.get("api_memory", 1024), 60, None),
+            # Own function: Bedrock-bound (see Memory Tuning in README), 5 min timeout, capped for cost control
+            (
+                "extract",
+                "lambda.handlers.extract.handler",
+                self.config.get("extract_memory", 1024),
+                300,
+                self.config.get("lambda_reserved_concurrency"),
+            ),
+        ]
+
+        for name, handler, memory_size, timeout, reserved_concurrency in specs:
+            functions[name] = lambda_.Function(
+                self,
+                f"{name.capitalize()}Function",
+                function_name=f"medextract-{name}-{self.env_name}",
+                runtime=lambda_.Runtime.PYTHON_3_13,
+                architecture=lambda_.Architecture.ARM_64,  # Graviton: lower $/GB-s
+                handler=handler,
+                code=shared_code,
+                role=self.lambda_role,
+                environment=common_env,
+                memory_size=memory_size,
+                timeout=Duration.seconds(timeout),
+                tracing=lambda_.Tracing.ACTIVE,  # X-Ray tracing
+                log_group=self._create_log_group(name),
+                logging_format=lambda_.LoggingFormat.JSON,
+                application_log_level_v2=lambda_.ApplicationLogLevel.INFO,
+                system_log_level_v2=lambda_.SystemLogLevel.INFO,  # Keep platform REPORT records (duration/memory)
+                snap_start=self._snap_start(name),
+                reserved_concurrent_executions=reserved_concurrency,
+            )
+
+        return functions
+
+    def _provisioned_concurrency(self, name: str) -> int:
+        """Warm instances configured for a function (0 disables)"""
+        return self.config.get(f"{name}_provisioned_concurrency", 0)
+
+    def _snap_start(self, name: str):
+        """SnapStart unless the function uses provisioned concurrency (Lambda allows only one)"""
+        if self._provisioned_concurrency(name):
+            return None
+        return lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS
+
+    def _create_lambda_aliases(self) -> Dict[str, lambda_.Alias]:
+        """Publish a version per function and point a 'live' alias at it
+
+        SnapStart snapshots and provisioned concurrency both apply to published
+        versions only, so every trigger invokes the alias rather than $LATEST.
+        """
+        aliases = {}
+        for name, func in self.lambda_functions.items():
+            provisioned = self._provisioned_concurrency(name)
+            aliases[name] = lambda_.Alias(
+                self,
+                f"{name.capitalize()}LiveAlias",
+                alias_name="live",
+                version=func.current_version,
+                provisioned_concurrent_executions=provisioned or None,
+            )
+            if provisioned:
+                # Scale warm instances with demand, never below the configured floor
+                aliases[name].add_auto_scaling(
+                    min_capacity=provisioned, max_capacity=max(provisioned, 10)
+                ).scale_on_utilization(utilization_target=0.7)
+
+        # Direct HTTPS endpoint for synchronous extraction: unlike REST API Gateway (29s
+        # integration limit) it waits for the full function timeout. Buffered, since the
+        # managed Python runtime cannot stream responses.
+        self.extract_url = aliases["extract"].add_function_url(
+            auth_type=lambda_.FunctionUrlAuthType.AWS_IAM,
+            invoke_mode=lambda_.InvokeMode.BUFFERED,
+            cors=lambda_.FunctionUrlCorsOptions(
+                allowed_origins=["http://localhost:3000", "http://localhost:5173"],
+                allowed_methods=[lambda_.HttpMethod.POST],
+                allowed_headers=["Content-Type", "Authorization"],
+            ),
         )
-        
-        # 3. Metrics Handler - Calculate MLOps metrics
-        functions["metrics"] = lambda_.Function(
-            self,
-            "MetricsFunction",
-            function_name=f"medextract-metrics-{self.env_name}",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="lambda.handlers.metrics.handler",
-            code=lambda_.Code.from_asset("../backend", bundling=bundling_config),
-            role=self.lambda_role,
-            environment=common_env,
-            memory_size=1024,  # Medium memory for aggregations
-            timeout=Duration.seconds(60),
-            tracing=lambda_.Tracing.ACTIVE,
-            log_retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
+
+        # Pre-signed uploads go straight to S3; the notification marks them uploaded
+        self.document_bucket.add_event_notification(
+            s3.EventType.OBJECT_CREATED,
+            s3n.LambdaDestination(aliases["api"]),
+            s3.NotificationKeyFilter(prefix="documents/"),
         )
-        
-        # 4. Experiment Handler - Manage A/B tests
-        functions["experiment"] = lambda_.Function(
+
+        return aliases
+
+    def _create_extract_queue(self) -> sqs.Queue:
+        """Create SQS queue feeding the extract function, with a dead-letter queue"""
+        dead_letter_queue = sqs.Queue(
             self,
-            "ExperimentFunction",
-            function_name=f"medextract-experiment-{self.env_name}",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="lambda.handlers.experiment.handler",
-            code=lambda_.Code.from_asset("../backend", bundling=bundling_config),
-            role=self.lambda_role,
-            environment=common_env,
-            memory_size=512,
-            timeout=Duration.seconds(60),
-            tracing=lambda_.Tracing.ACTIVE,
-            log_retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
+            "ExtractDeadLetterQueue",
+            queue_name=f"medextract-extract-dlq-{self.env_name}",
+            retention_period=Duration.days(14),
         )
-        
-        # 5. Prompts Handler - List available prompt versions
-        functions["prompts"] = lambda_.Function(
+
+        queue = sqs.Queue(
             self,
-            "PromptsFunction",
-            function_name=f"medextract-prompts-{self.env_name}",
-            runtime=lambda_.Runtime.PYTHON_3_11,
-            handler="lambda.handlers.prompts.handler",
-            code=lambda_.Code.from_asset("../backend", bundling=bundling_config),
-            role=self.lambda_role,
-            environment=common_env,
-            memory_size=256,  # Minimal memory for listing files
-            timeout=Duration.seconds(30),
-            tracing=lambda_.Tracing.ACTIVE,
-            log_retention=logs.RetentionDays.ONE_WEEK if self.env_name == "dev" else logs.RetentionDays.ONE_MONTH,
+            "ExtractQueue",
+            queue_name=f"medextract-extract-{self.env_name}",
+            visibility_timeout=Duration.seconds(360),  # Longer than the 300s function timeout
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=3, queue=dead_letter_queue),
+        )
+
+        # One document per invocation; failed messages are retried, then dead-lettered
+        self.lambda_aliases["extract"].add_event_source(
+            lambda_events.SqsEventSource(queue, batch_size=1, report_batch_item_failures=True)
         )
-        
-        # Grant permissions to all functions
-        for func in functions.values():
-            self.document_bucket.grant_read_write(func)
-            self.results_table.grant_read_write_data(func)
-            self.experiments_table.grant_read_write_data(func)
-        
-        return functions
+
+        return queue
 
     def _create_api_gateway(self) -> apigw.RestApi:
         """Create API Gateway for Lambda functions"""
@@ -369,6 +530,10 @@ class MedExtractStack(Stack):
             "MedExtractApi",
             rest_api_name=f"medextract-api-{self.env_name}",
             description="Serverless API for MedExtract platform",
+            # Regional: no CloudFront hop in front of same-region clients
+            endpoint_types=[apigw.EndpointType.REGIONAL],
+            # Gzip responses for clients sending Accept-Encoding; small payloads stay as-is
+            min_compression_size=Size.kibibytes(4),
             deploy_options=apigw.StageOptions(
                 stage_name=self.env_name,
                 tracing_enabled=True,  # X-Ray tracing
@@ -383,6 +548,7 @@ class MedExtractStack(Stack):
                 allow_origins=["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"],
                 allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
                 allow_headers=["Content-Type", "Authorization"],
+                max_age=Duration.hours(24),  # Browsers may cap this lower (e.g. Chrome at 2h)
             ),
         )
         
@@ -393,42 +559,101 @@ class MedExtractStack(Stack):
         upload_resource = api_root.add_resource("upload")
         upload_resource.add_method(
             "POST",
-            apigw.LambdaIntegration(self.lambda_functions["upload"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
-        # /api/extract/{document_id}
+        # /api/extract/{document_id} - queued straight to SQS, poll /api/results/{document_id}
+        sqs_role = iam.Role(
+            self,
+            "ApiGatewaySqsRole",
+            assumed_by=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            description="Lets API Gateway enqueue extraction requests",
+        )
+        self.extract_queue.grant_send_messages(sqs_role)
+
+        cors_header = "method.response.header.Access-Control-Allow-Origin"
         extract_resource = api_root.add_resource("extract")
         extract_doc = extract_resource.add_resource("{document_id}")
         extract_doc.add_method(
             "POST",
-            apigw.LambdaIntegration(self.lambda_functions["extract"]),
+            apigw.AwsIntegration(
+                service="sqs",
+                path=f"{self.account}/{self.extract_queue.queue_name}",
+                integration_http_method="POST",
+                options=apigw.IntegrationOptions(
+                    credentials_role=sqs_role,
+                    passthrough_behavior=apigw.PassthroughBehavior.NEVER,
+                    request_parameters={
+                        "integration.request.header.Content-Type": "'application/x-www-form-urlencoded'",
+                    },
+                    # Body (prompt_version) becomes the message; document_id a message attribute
+                    request_templates={
+                        "application/json": (
+                            '#set($body = $input.body)#if($body == "")#set($body = "{}")#{end}'
+                            "Action=SendMessage&MessageBody=$util.urlEncode($body)"
+                            "&MessageAttribute.1.Name=document_id"
+                            "&MessageAttribute.1.Value.DataType=String"
+                            "&MessageAttribute.1.Value.StringValue=$util.urlEncode($input.params('document_id'))"
+                        ),
+                    },
+                    integration_responses=[
+                        apigw.IntegrationResponse(
+                            status_code="202",
+                            response_parameters={cors_header: "'*'"},
+                            response_templates={
+                                "application/json": '{"document_id": "$input.params(\'document_id\')", "status": "queued"}',
+                            },
+                        ),
+                        apigw.IntegrationResponse(
+                            status_code="500",
+                            selection_pattern="[45]\\d{2}",
+                            response_parameters={cors_header: "'*'"},
+                            response_templates={
+                                "application/json": '{"error": "QueueError", "message": "Failed to queue extraction"}',
+                            },
+                        ),
+                    ],
+                ),
+            ),
+            method_responses=[
+                apigw.MethodResponse(status_code="202", response_parameters={cors_header: True}),
+                apigw.MethodResponse(status_code="500", response_parameters={cors_header: True}),
+            ],
+        )
+
+        # /api/results/{document_id}
+        results_resource = api_root.add_resource("results")
+        results_doc = results_resource.add_resource("{document_id}")
+        results_doc.add_method(
+            "GET",
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
-        # /api/process/{document_id} (alias for extract)
+        # /api/process/{document_id} (synchronous extract)
         process_resource = api_root.add_resource("process")
         process_doc = process_resource.add_resource("{document_id}")
         process_doc.add_method(
             "POST",
-            apigw.LambdaIntegration(self.lambda_functions["extract"]),
+            apigw.LambdaIntegration(self.lambda_aliases["extract"]),
         )
         
         # /api/metrics/*
         metrics_resource = api_root.add_resource("metrics")
         metrics_resource.add_method(
             "GET",
-            apigw.LambdaIntegration(self.lambda_functions["metrics"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         metrics_prompts = metrics_resource.add_resource("prompts").add_resource("{version}")
         metrics_prompts.add_method(
             "GET",
-            apigw.LambdaIntegration(self.lambda_functions["metrics"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
         # /api/metrics/compare
         metrics_compare = metrics_resource.add_resource("compare")
         metrics_compare.add_method(
             "POST",
-            apigw.LambdaIntegration(self.lambda_functions["metrics"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
         # /api/prompts/versions
@@ -436,7 +661,7 @@ class MedExtractStack(Stack):
         prompts_versions = prompts_resource.add_resource("versions")
         prompts_versions.add_method(
             "GET",
-            apigw.LambdaIntegration(self.lambda_functions["prompts"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
         # /api/lambda/metrics
@@ -444,18 +669,18 @@ class MedExtractStack(Stack):
         lambda_metrics = lambda_resource.add_resource("metrics")
         lambda_metrics.add_method(
             "GET",
-            apigw.LambdaIntegration(self.lambda_functions["metrics"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
         # /api/experiments/*
         experiments_resource = api_root.add_resource("experiments")
         experiments_resource.add_method(
             "GET",
-            apigw.LambdaIntegration(self.lambda_functions["experiment"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         experiments_resource.add_method(
             "POST",
-            apigw.LambdaIntegration(self.lambda_functions["experiment"]),
+            apigw.LambdaIntegration(self.lambda_aliases["api"]),
         )
         
         return api
@@ -471,35 +696,113 @@ class MedExtractStack(Stack):
         return topic
 
     def _create_cloudwatch_alarms(self):
-        """Create CloudWatch alarms for monitoring"""
-        
-        # DynamoDB Read/Write Capacity Alarms (for provisioned mode)
-        if self.config["dynamodb_billing_mode"] == "PROVISIONED":
-            # Results table read capacity alarm
-            cloudwatch.Alarm(
+        """Create CloudWatch alarms for monitoring
+
+        Individual alarms don't notify; one composite alarm pages once when any
+        of them fires, so a wide outage doesn't send a burst of duplicate alerts.
+        """
+        alarms = []
+
+        # DynamoDB capacity utilization alarms (for provisioned mode)
+        if self._choose_billing_mode("results") == dynamodb.BillingMode.PROVISIONED:
+            alarms.append(cloudwatch.Alarm(
                 self,
-                "ResultsTableReadCapacityAlarm",
-                alarm_name=f"medextract-results-read-capacity-{self.env_name}",
-                metric=self.results_table.metric_consumed_read_capacity_units(
-                    statistic="Average", period=Duration.minutes(5)
+                "ResultsTableCapacityAlarm",
+                alarm_name=f"medextract-results-capacity-{self.env_name}",
+                metric=self._capacity_utilization(
+                    "Results table",
+                    {"TableName": self.results_table.table_name},
+                    self.config.get("dynamodb_read_capacity", 5),
+                    self.config.get("dynamodb_write_capacity", 5),
                 ),
-                threshold=self.config.get("dynamodb_read_capacity", 5) * 0.8,  # 80% threshold
-                evaluation_periods=2,
-                alarm_description="Results table read capacity approaching limit",
-            ).add_alarm_action(cw_actions.SnsAction(self.alert_topic))
+                threshold=0.8,  # 80% of provisioned read or write capacity
+                evaluation_periods=5,
+                alarm_description="Results table read or write capacity approaching limit",
+            ))
+
+            for index_name in self.results_indexes:
+                capacity = self._gsi_capacity(index_name)
+
+                alarms.append(cloudwatch.Alarm(
+                    self,
+                    f"{index_name}CapacityAlarm",
+                    alarm_name=f"medextract-results-{index_name}-capacity-{self.env_name}",
+                    metric=self._capacity_utilization(
+                        index_name,
+                        {"TableName": self.results_table.table_name, "GlobalSecondaryIndexName": index_name},
+                        capacity["read_capacity"],
+                        capacity["write_capacity"],
+                    ),
+                    threshold=0.8,
+                    evaluation_periods=5,
+                    alarm_description=f"{index_name} read or write capacity approaching limit",
+                ))
+
+        # Throttling, in any billing mode (on-demand tables still throttle on hot partitions).
+        # Fires on the first throttled request instead of waiting for sustained utilization.
+        alarms.append(cloudwatch.Alarm(
+            self,
+            "ResultsTableThrottleAlarm",
+            alarm_name=f"medextract-results-throttle-{self.env_name}",
+            metric=cloudwatch.MathExpression(
+                # Throttle metrics are only published for periods with throttles
+                expression="FILL(r, 0) + FILL(w, 0)",
+                using_metrics={
+                    key: cloudwatch.Metric(
+                        namespace="AWS/DynamoDB",
+                        metric_name=metric_name,
+                        dimensions_map={"TableName": self.results_table.table_name},
+                        statistic="Sum",
+                        period=Duration.minutes(1),
+                    )
+                    for key, metric_name in (("r", "ReadThrottleEvents"), ("w", "WriteThrottleEvents"))
+                },
+                period=Duration.minutes(1),
+                label="Results table throttle events",
+            ),
+            threshold=1,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+            evaluation_periods=1,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            alarm_description="Results table throttled reads or writes (see Contributor Insights for hot keys)",
+        ))
 
-            # Results table write capacity alarm
-            cloudwatch.Alarm(
+        for index_name in self.results_indexes:
+            # GSI write throttling back-pressures (fails) writes to the base table
+            alarms.append(cloudwatch.Alarm(
                 self,
-                "ResultsTableWriteCapacityAlarm",
-                alarm_name=f"medextract-results-write-capacity-{self.env_name}",
-                metric=self.results_table.metric_consumed_write_capacity_units(
-                    statistic="Average", period=Duration.minutes(5)
+                f"{index_name}WriteThrottleAlarm",
+                alarm_name=f"medextract-results-{index_name}-write-throttle-{self.env_name}",
+                metric=cloudwatch.Metric(
+                    namespace="AWS/DynamoDB",
+                    metric_name="WriteThrottleEvents",
+                    dimensions_map={
+                        "TableName": self.results_table.table_name,
+                        "GlobalSecondaryIndexName": index_name,
+                    },
+                    statistic="Sum",
+                    period=Duration.minutes(1),
                 ),
-                threshold=self.config.get("dynamodb_write_capacity", 5) * 0.8,
-                evaluation_periods=2,
-                alarm_description="Results table write capacity approaching limit",
-            ).add_alarm_action(cw_actions.SnsAction(self.alert_topic))
+                threshold=0,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description=f"{index_name} throttled writes (base table writes fail too)",
+            ))
+
+        # Extraction requests that failed every retry
+        alarms.append(cloudwatch.Alarm(
+            self,
+            "ExtractDeadLetterAlarm",
+            alarm_name=f"medextract-extract-dlq-{self.env_name}",
+            metric=self.extract_queue.dead_letter_queue.queue.metric_approximate_number_of_messages_visible(
+                period=Duration.minutes(5)
+            ),
+            threshold=0,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            evaluation_periods=1,
+            alarm_description="Queued extractions failed after 3 attempts",
+        ))
 
         # S3 bucket size alarm (cost monitoring)
         bucket_size_metric = cloudwatch.Metric(
@@ -513,7 +816,7 @@ class MedExtractStack(Stack):
             period=Duration.days(1),
         )
 
-        cloudwatch.Alarm(
+        alarms.append(cloudwatch.Alarm(
             self,
             "S3BucketSizeAlarm",
             alarm_name=f"medextract-s3-size-{self.env_name}",
@@ -521,7 +824,47 @@ class MedExtractStack(Stack):
             threshold=100 * 1024 * 1024 * 1024,  # 100 GB
             evaluation_periods=1,
             alarm_description="S3 bucket size exceeded 100 GB",
-        ).add_alarm_action(cw_actions.SnsAction(self.alert_topic))
+        ))
+
+        health = cloudwatch.CompositeAlarm(
+            self,
+            "MedExtractHealthAlarm",
+            composite_alarm_name=f"medextract-health-{self.env_name}",
+            alarm_rule=cloudwatch.AlarmRule.any_of(
+                *[cloudwatch.AlarmRule.from_alarm(alarm, cloudwatch.AlarmState.ALARM) for alarm in alarms]
+            ),
+            alarm_description="One or more MedExtract alarms are firing (see the child alarms for which)",
+        )
+        health.add_alarm_action(cw_actions.SnsAction(self.alert_topic))
+
+    def _capacity_utilization(
+        self, label: str, dimensions: Dict[str, str], read_capacity: int, write_capacity: int
+    ) -> cloudwatch.MathExpression:
+        """Consumed units per second over provisioned units, whichever side is hotter"""
+        period = Duration.minutes(1)
+        consumed = {
+            key: cloudwatch.Metric(
+                namespace="AWS/DynamoDB",
+                metric_name=metric_name,
+                dimensions_map=dimensions,
+                statistic="Sum",
+                period=period,
+            )
+            for key, metric_name in (
+                ("r", "ConsumedReadCapacityUnits"),
+                ("w", "ConsumedWriteCapacityUnits"),
+            )
+        }
+
+        return cloudwatch.MathExpression(
+            expression=(
+                f"MAX([r / ({read_capacity} * {period.to_seconds()}), "
+                f"w / ({write_capacity} * {period.to_seconds()})])"
+            ),
+            using_metrics=consumed,
+            period=period,
+            label=f"{label} capacity utilization",
+        )
 
     def _create_outputs(self):
         """Create CloudFormation outputs"""
@@ -534,6 +877,13 @@ class MedExtractStack(Stack):
             export_name=f"MedExtract-{self.env_name}-DocumentBucket",
         )
 
+        CfnOutput(
+            self,
+            "DocumentBucketAccelerateEndpoint",
+            value=f"{self.document_bucket.bucket_name}.s3-accelerate.amazonaws.com",
+            description="S3 Transfer Acceleration endpoint for document uploads",
+        )
+
         CfnOutput(
             self,
             "ResultsTableName",
@@ -561,10 +911,10 @@ class MedExtractStack(Stack):
         # Lambda function outputs
         CfnOutput(
             self,
-            "UploadFunctionArn",
-            value=self.lambda_functions["upload"].function_arn,
-            description="Upload Lambda function ARN",
-            export_name=f"MedExtract-{self.env_name}-UploadFunction",
+            "ApiFunctionArn",
+            value=self.lambda_functions["api"].function_arn,
+            description="API router Lambda function ARN",
+            export_name=f"MedExtract-{self.env_name}-ApiFunction",
         )
 
         CfnOutput(
@@ -575,6 +925,22 @@ class MedExtractStack(Stack):
             export_name=f"MedExtract-{self.env_name}-ExtractFunction",
         )
 
+        CfnOutput(
+            self,
+            "ExtractQueueUrl",
+            value=self.extract_queue.queue_url,
+            description="SQS queue for asynchronous extraction requests",
+            export_name=f"MedExtract-{self.env_name}-ExtractQueue",
+        )
+
+        CfnOutput(
+            self,
+            "ExtractFunctionUrl",
+            value=self.extract_url.url,
+            description="IAM-authenticated URL for synchronous extraction (POST {url}{document_id})",
+            export_name=f"MedExtract-{self.env_name}-ExtractUrl",
+        )
+
         # API Gateway output
         CfnOutput(
             self,